@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks FuturesSession against a local HTTP server.
+
+Each combination of executor type, worker count, and connection pool size is
+run in a fresh interpreter so that CPU and peak RSS measurements aren't
+polluted by earlier runs. The server runs in this process, with configurable
+latency, payload size, and error rate.
+
+    # run the default matrix and save the results
+    ./script/benchmark --output results.json
+    # compare a later run against them, exits non-zero on regressions
+    ./script/benchmark --baseline results.json
+
+"""
+
+import json
+import random
+import resource
+import subprocess
+import sys
+from argparse import SUPPRESS, ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from threading import Thread
+from time import perf_counter, sleep
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a payload after a delay, or sometimes a 500.
+    `latency`, `size`, and `error_rate` query params override the server's
+    defaults."""
+
+    protocol_version = 'HTTP/1.1'
+    # write the response in one go rather than waiting on delayed ACKs
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def do_GET(self):
+        config = self.server.config
+        query = parse_qs(urlparse(self.path).query)
+        latency = float(query.get('latency', [config['latency']])[0])
+        size = int(query.get('size', [config['size']])[0])
+        error_rate = float(query.get('error_rate', [config['error_rate']])[0])
+
+        if latency:
+            sleep(latency)
+        if random.random() < error_rate:
+            status, body = 500, b'error'
+        else:
+            status, body = 200, self.server.payload(size)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # lots of connections show up at once
+    request_queue_size = 1024
+
+    def __init__(self, latency=0.0, size=1024, error_rate=0.0):
+        super(BenchServer, self).__init__(('127.0.0.1', 0), BenchHandler)
+        self.config = {
+            'latency': latency,
+            'size': size,
+            'error_rate': error_rate,
+        }
+        self._payloads = {}
+
+    def payload(self, size):
+        try:
+            return self._payloads[size]
+        except KeyError:
+            return self._payloads.setdefault(size, b'x' * size)
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+    def start(self):
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def _percentile(values, percentile):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * percentile / 100.0), len(values) - 1)]
+
+
+def _usage():
+    usage = {}
+    for who, name in (
+        (resource.RUSAGE_SELF, 'self'),
+        (resource.RUSAGE_CHILDREN, 'children'),
+    ):
+        ru = resource.getrusage(who)
+        usage[name] = (ru.ru_utime + ru.ru_stime, ru.ru_maxrss)
+    return usage
+
+
+def _rss_mb(maxrss):
+    # linux reports KiB, macOS bytes
+    return maxrss / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0)
+
+
+def run_scenario(scenario):
+    """Runs one scenario in this process and returns its measurements"""
+    from requests_futures.sessions import FuturesSession
+
+    kwargs = {
+        'max_workers': scenario['workers'],
+        'adapter_kwargs': {
+            'pool_connections': scenario['pool_size'],
+            'pool_maxsize': scenario['pool_size'],
+        },
+    }
+    if scenario['executor'] == 'process':
+        kwargs['use_processes'] = True
+    elif scenario['executor'] == 'thread-local':
+        kwargs['thread_local_sessions'] = True
+    elif scenario['executor'] == 'parallel':
+        kwargs['parallel'] = True
+    session = FuturesSession(**kwargs)
+
+    url = scenario['url']
+    # warm up the workers and their connections
+    for resp in session.map([url] * scenario['workers'] * 2):
+        pass
+
+    before = _usage()
+    latencies = []
+    errors = 0
+    start = perf_counter()
+    urls = (url for _ in range(scenario['requests']))
+    for resp in session.imap_unordered(urls, return_exceptions=True):
+        if isinstance(resp, Exception) or resp.status_code >= 500:
+            errors += 1
+        else:
+            latencies.append(resp.timings.total)
+    elapsed = perf_counter() - start
+    # process workers' usage is only counted once they've exited
+    session.close()
+    after = _usage()
+
+    cpu = sum(after[k][0] - before[k][0] for k in after)
+    return {
+        'backend': session.backend,
+        'requests': scenario['requests'],
+        'errors': errors,
+        'elapsed': elapsed,
+        'rps': scenario['requests'] / elapsed,
+        'p50': _percentile(latencies, 50),
+        'p99': _percentile(latencies, 99),
+        'cpu': cpu,
+        'cpu_per_request_ms': cpu * 1000.0 / scenario['requests'],
+        'peak_rss_mb': _rss_mb(
+            max(after['self'][1], after['children'][1] or 0)
+        ),
+    }
+
+
+def scenario_name(scenario):
+    return '{executor}-w{workers}-p{pool_size}'.format(**scenario)
+
+
+def compare(results, baseline, threshold):
+    """Returns descriptions of the results that regressed past `threshold`
+    relative to `baseline`"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['rps'] < base['rps'] * (1 - threshold):
+            regressions.append(
+                '{}: rps {:.1f} < baseline {:.1f}'.format(
+                    name, result['rps'], base['rps']
+                )
+            )
+        if (
+            result['p99'] is not None
+            and base['p99'] is not None
+            and result['p99'] > base['p99'] * (1 + threshold)
+        ):
+            regressions.append(
+                '{}: p99 {:.2f}ms > baseline {:.2f}ms'.format(
+                    name, result['p99'] * 1000, base['p99'] * 1000
+                )
+            )
+    return regressions
+
+
+def _ints(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument(
+        '--executors',
+        default='thread,process',
+        help='comma separated executor types, thread, thread-local (a '
+        'session per thread), parallel (free-threading or interpreters when '
+        'available, threads otherwise), and/or process',
+    )
+    parser.add_argument('--workers', default='4,16', type=_ints)
+    parser.add_argument('--pool-sizes', default='10,32', type=_ints)
+    parser.add_argument('--requests', default=2000, type=int)
+    parser.add_argument(
+        '--latency', default=0.005, type=float, help='server latency, seconds'
+    )
+    parser.add_argument(
+        '--size', default=1024, type=int, help='response size, bytes'
+    )
+    parser.add_argument(
+        '--error-rate', default=0.0, type=float, help='fraction of 500s'
+    )
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument(
+        '--threshold',
+        default=0.1,
+        type=float,
+        help='relative change in rps or p99 that counts as a regression',
+    )
+    parser.add_argument('--scenario', help=SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        # we're a child process running one scenario
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return 0
+
+    server = BenchServer(args.latency, args.size, args.error_rate).start()
+    results = {}
+    print(
+        '{:<24} {:>9} {:>9} {:>9} {:>7} {:>10} {:>9}'.format(
+            'scenario',
+            'rps',
+            'p50 ms',
+            'p99 ms',
+            'errors',
+            'cpu ms/req',
+            'rss MB',
+        )
+    )
+    for executor in args.executors.split(','):
+        for workers in args.workers:
+            for pool_size in args.pool_sizes:
+                scenario = {
+                    'executor': executor,
+                    'workers': workers,
+                    'pool_size': pool_size,
+                    'requests': args.requests,
+                    'url': server.url,
+                }
+                output = subprocess.check_output(
+                    [
+                        sys.executable,
+                        path.abspath(__file__),
+                        '--scenario',
+                        json.dumps(scenario),
+                    ]
+                )
+                result = json.loads(output.decode('utf-8').splitlines()[-1])
+                name = scenario_name(scenario)
+                results[name] = dict(scenario, **result)
+                print(
+                    '{:<24} {:>9.1f} {:>9.2f} {:>9.2f} {:>7} {:>10.3f} '
+                    '{:>9.1f}'.format(
+                        name,
+                        result['rps'],
+                        (result['p50'] or 0) * 1000,
+                        (result['p99'] or 0) * 1000,
+                        result['errors'],
+                        result['cpu_per_request_ms'],
+                        result['peak_rss_mb'],
+                    )
+                )
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(
+                {
+                    'config': {
+                        'latency': args.latency,
+                        'size': args.size,
+                        'error_rate': args.error_rate,
+                        'python': sys.version.split()[0],
+                    },
+                    'results': results,
+                },
+                fh,
+                indent=2,
+                sort_keys=True,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('REGRESSION {}'.format(regression))
+        if regressions:
+            return 1
+        print('no regressions against {}'.format(args.baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.adapters
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Transport adapters for FuturesSession. `FuturesHTTPAdapter` is a drop-in
+`HTTPAdapter` whose connection pools keep track of how they're being used and
+time how long requests wait for, and spend opening, connections. It can also
+share a `DNSCache` between all of its connections.
+
+"""
+
+import socket
+from ipaddress import ip_address
+from threading import Lock, local
+from time import monotonic, time
+from weakref import WeakSet
+
+from requests.adapters import DEFAULT_POOLBLOCK, HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.poolmanager import PoolManager
+from urllib3.util.connection import allowed_gai_family
+
+# seconds the current thread has spent waiting on connection pools and
+# connecting since the last call to reset_timings
+timings = local()
+
+
+def reset_timings():
+    timings.pool_wait = 0.0
+    timings.connect = 0.0
+
+
+def _add_timing(name, elapsed):
+    setattr(timings, name, getattr(timings, name, 0.0) + elapsed)
+
+
+class DNSCache(object):
+    """Remembers the addresses hosts resolve to for `ttl` seconds so that
+    new connections don't each wait on a lookup. Safe to share between
+    threads and adapters."""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = Lock()
+
+    def __getstate__(self):
+        # lookups aren't worth sending elsewhere, and locks don't pickle
+        return {'ttl': self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(state['ttl'])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def resolve(self, host, port, now=None):
+        """Returns the addresses for `host`, looking them up if they're not
+        cached or have expired"""
+        try:
+            ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        now = monotonic() if now is None else now
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        addresses = []
+        for _, _, _, _, sockaddr in socket.getaddrinfo(
+            host, port, allowed_gai_family(), socket.SOCK_STREAM
+        ):
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _TimedConnectionMixin(object):
+    # set by the pool when connections should use a DNSCache
+    dns_cache = None
+
+    def _new_conn(self):
+        cache = self.dns_cache
+        if cache is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+        host = self._dns_host
+        addresses = cache.resolve(host, self.port)
+        try:
+            for i, address in enumerate(addresses):
+                # errors still name self.host, it's only the socket that
+                # uses the address
+                self._dns_host = address
+                try:
+                    return super(_TimedConnectionMixin, self)._new_conn()
+                except (ConnectTimeoutError, NewConnectionError):
+                    if i == len(addresses) - 1:
+                        # maybe they've moved, look them up again next time
+                        cache.forget(host, self.port)
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        start = time()
+        try:
+            super(_TimedConnectionMixin, self).connect()
+        finally:
+            _add_timing('connect', time() - start)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _InstrumentedPoolMixin(object):
+    def __init__(self, *args, **kwargs):
+        super(_InstrumentedPoolMixin, self).__init__(*args, **kwargs)
+        # times a request found no idle connection in the pool
+        self.waits = 0
+        # connections closed because the pool was already full
+        self.discarded = 0
+        self._stats_lock = Lock()
+        self.dns_cache = None
+        # connections checked out by requests, for abort
+        self._in_use = WeakSet()
+
+    def _new_conn(self):
+        conn = super(_InstrumentedPoolMixin, self)._new_conn()
+        conn.dns_cache = self.dns_cache
+        return conn
+
+    def _get_conn(self, timeout=None):
+        pool = self.pool
+        if pool is not None and pool.empty():
+            with self._stats_lock:
+                self.waits += 1
+        start = time()
+        try:
+            conn = super(_InstrumentedPoolMixin, self)._get_conn(timeout)
+        finally:
+            _add_timing('pool_wait', time() - start)
+        with self._stats_lock:
+            self._in_use.add(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        pool = self.pool
+        with self._stats_lock:
+            if conn is not None:
+                self._in_use.discard(conn)
+                if pool is not None and pool.full():
+                    self.discarded += 1
+        super(_InstrumentedPoolMixin, self)._put_conn(conn)
+
+    def abort(self):
+        """Shuts the sockets of the connections requests are using, failing
+        the requests rather than waiting for them. Returns how many there
+        were."""
+        with self._stats_lock:
+            conns = list(self._in_use)
+        aborted = 0
+        for conn in conns:
+            sock = getattr(conn, 'sock', None)
+            if sock is None:
+                continue
+            try:
+                # wakes up whoever's blocked reading or writing it
+                sock.shutdown(socket.SHUT_RDWR)
+                aborted += 1
+            except OSError:
+                # already closed
+                pass
+        return aborted
+
+    def stats(self):
+        pool = self.pool
+        if pool is None:
+            # closed
+            return {
+                'in_use': 0,
+                'idle': 0,
+                'maxsize': 0,
+                'waits': self.waits,
+                'discarded': self.discarded,
+            }
+        # the queue starts out holding maxsize Nones, placeholders for
+        # connections that haven't been opened yet
+        queued = list(pool.queue)
+        return {
+            'in_use': max(pool.maxsize - len(queued), 0),
+            'idle': sum(1 for conn in queued if conn is not None),
+            'maxsize': pool.maxsize,
+            'waits': self.waits,
+            'discarded': self.discarded,
+        }
+
+
+class InstrumentedHTTPConnectionPool(
+    _InstrumentedPoolMixin, HTTPConnectionPool
+):
+    ConnectionCls = TimedHTTPConnection
+
+
+class InstrumentedHTTPSConnectionPool(
+    _InstrumentedPoolMixin, HTTPSConnectionPool
+):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def _resize_pool(pool, maxsize):
+    """Changes the size of a live connection pool without dropping any of
+    its connections. Surplus connections are discarded as they're returned
+    when it shrinks."""
+    queue = pool.pool
+    if queue is None:
+        # closed
+        return
+    with queue.mutex:
+        grow = maxsize - queue.maxsize
+        queue.maxsize = maxsize
+        if grow > 0:
+            # placeholders go at the bottom so idle connections are used first
+            queue.queue[0:0] = [None] * grow
+            queue.not_empty.notify(grow)
+
+
+class FuturesPoolManager(PoolManager):
+    """A PoolManager whose pools are all made `maxsize` once `resize` has
+    been called, and whose connections use `dns_cache` if it's set"""
+
+    resized = None
+    dns_cache = None
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super(FuturesPoolManager, self)._new_pool(
+            scheme, host, port, request_context
+        )
+        # maxsize is part of the pool key so it's left alone in
+        # connection_pool_kw and applied here instead
+        if self.resized is not None:
+            _resize_pool(pool, self.resized)
+        if isinstance(pool, _InstrumentedPoolMixin):
+            pool.dns_cache = self.dns_cache
+        return pool
+
+    def resize(self, maxsize):
+        self.resized = maxsize
+        for pool in self._current_pools():
+            _resize_pool(pool, maxsize)
+
+    def abort(self):
+        aborted = 0
+        for pool in self._current_pools():
+            if isinstance(pool, _InstrumentedPoolMixin):
+                aborted += pool.abort()
+        return aborted
+
+    def _current_pools(self):
+        with self.pools.lock:
+            return list(self.pools._container.values())
+
+
+class FuturesHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter with instrumented, resizable, connection pools. Takes
+    the same arguments as HTTPAdapter, plus an optional `dns_cache`."""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['dns_cache']
+
+    pool_classes_by_scheme = {
+        'http': InstrumentedHTTPConnectionPool,
+        'https': InstrumentedHTTPSConnectionPool,
+    }
+
+    def __init__(self, *args, dns_cache=None, **kwargs):
+        # needed by init_poolmanager, which HTTPAdapter.__init__ calls
+        self.dns_cache = dns_cache
+        super(FuturesHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def init_poolmanager(
+        self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs
+    ):
+        # save these values for pickling
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        self.poolmanager = FuturesPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes_by_scheme
+        self.poolmanager.dns_cache = self.dns_cache
+
+    def resize(self, maxsize):
+        """Changes the size of the adapter's connection pools, including
+        the ones that already exist"""
+        self._pool_maxsize = maxsize
+        self.poolmanager.resize(maxsize)
+
+    def abort(self):
+        """Fails the adapter's in flight requests by shutting their
+        connections, returns how many were"""
+        return self.poolmanager.abort()
+
+    def pool_stats(self):
+        """Returns usage stats for each of the adapter's connection pools,
+        keyed by `scheme://host:port`"""
+        pools = self.poolmanager.pools
+        with pools.lock:
+            current = list(pools._container.values())
+        stats = {}
+        for pool in current:
+            if not isinstance(pool, _InstrumentedPoolMixin):
+                continue
+            key = '{}://{}:{}'.format(pool.scheme, pool.host, pool.port)
+            totals = stats.setdefault(key, {})
+            for name, value in pool.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return stats
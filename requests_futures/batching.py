@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.batching
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Batches lots of small payloads, e.g. telemetry events, into fewer, bigger,
+requests. Items are encoded as they're sent and buffered until there are
+`max_items` of them, they add up to `max_bytes`, or the oldest has waited
+`max_delay` seconds, at which point they're posted together.
+
+    from requests_futures.batching import BatchSender
+    from requests_futures.sessions import FuturesSession
+
+    session = FuturesSession()
+    sender = BatchSender(session, 'https://example.com/events',
+                         max_items=500, max_delay=0.5, futures=False)
+    for event in events:
+        sender.send(event)
+    # sends whatever's left and waits for it to go
+    sender.close()
+
+"""
+
+import json
+from concurrent.futures import Future
+from functools import partial
+from threading import Condition, Thread
+from time import monotonic
+
+from .sessions import FuturesSession, SaturatedError
+
+
+class NDJSONEncoder(object):
+    """Newline delimited JSON, one item per line"""
+
+    content_type = 'application/x-ndjson'
+
+    def encode_item(self, item):
+        return json.dumps(item, separators=(',', ':')).encode('utf-8')
+
+    def join(self, encoded):
+        return b'\n'.join(encoded) + b'\n'
+
+
+class JSONArrayEncoder(object):
+    """A JSON array of the items"""
+
+    content_type = 'application/json'
+
+    def encode_item(self, item):
+        return json.dumps(item, separators=(',', ':')).encode('utf-8')
+
+    def join(self, encoded):
+        return b'[' + b','.join(encoded) + b']'
+
+
+class BatchSender(object):
+    """Buffers items and sends them to `url` in batches through `session`.
+
+    `encoder` turns items into bytes one at a time, `encode_item`, and
+    batches of them into a request body, `join`, which is sent with its
+    `content_type`. It defaults to NDJSON.
+
+    A batch is sent once it has `max_items` items, its encoded items add up
+    to `max_bytes`, or `max_delay` seconds after its first item arrived. At
+    most `max_buffered` items may be waiting or in flight, beyond that `send`
+    blocks for up to `timeout` seconds, forever if it's None, and raises
+    `SaturatedError` if no room frees up.
+
+    With `futures` each `send` returns a Future for the response to its
+    batch, without them it returns None and there's nothing to create per
+    item. Other kwargs are passed to each batch's request.
+
+    Batches that have waited `max_delay` are sent by a thread of the
+    sender's own so that waiting for a `max_pending` slot doesn't hold up
+    anything else. With an AsyncFuturesSession the batches' Futures are
+    still concurrent.futures ones.
+    """
+
+    def __init__(
+        self,
+        session,
+        url,
+        method='POST',
+        encoder=None,
+        max_items=100,
+        max_bytes=1024 * 1024,
+        max_delay=1.0,
+        max_buffered=10000,
+        timeout=None,
+        futures=True,
+        **kwargs
+    ):
+        if max_items < 1 or max_buffered < max_items:
+            raise ValueError('max_buffered must be at least max_items >= 1')
+        self.session = session
+        self.url = url
+        self.method = method
+        self.encoder = encoder or NDJSONEncoder()
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_buffered = max_buffered
+        self.timeout = timeout
+        self.futures = futures
+        self.kwargs = kwargs
+
+        self._items = []
+        self._futures = []
+        self._bytes = 0
+        # when the current batch has waited long enough
+        self._expires = None
+        self._flusher = None
+        # items buffered or in batches that haven't completed yet
+        self._outstanding = 0
+        self._cond = Condition()
+        self.closed = False
+
+        batchers = getattr(session, '_batchers', None)
+        if batchers is not None:
+            # so the session can drain us when it's closed
+            batchers.add(self)
+
+    @property
+    def buffered(self):
+        """The number of items waiting to be sent"""
+        return len(self._items)
+
+    def send(self, item):
+        """Adds `item` to the current batch
+
+        :rtype : concurrent.futures.Future or None
+        """
+        encoded = self.encoder.encode_item(item)
+        future = Future() if self.futures else None
+        batches = []
+        with self._cond:
+            if self.closed:
+                raise RuntimeError('cannot send after close')
+            if not self._cond.wait_for(
+                lambda: self._outstanding < self.max_buffered, self.timeout
+            ):
+                raise SaturatedError(
+                    '{} items buffered or in flight, waited {}s for '
+                    'room'.format(self._outstanding, self.timeout)
+                )
+            if self._items and self._bytes + len(encoded) > self.max_bytes:
+                # it won't fit, send what's there first
+                batches.append(self._take())
+            self._items.append(encoded)
+            if future is not None:
+                self._futures.append(future)
+            self._bytes += len(encoded)
+            self._outstanding += 1
+            if (
+                len(self._items) >= self.max_items
+                or self._bytes >= self.max_bytes
+            ):
+                batches.append(self._take())
+            elif len(self._items) == 1:
+                self._expires = monotonic() + self.max_delay
+                if self._flusher is None:
+                    self._flusher = Thread(target=self._flush_expired)
+                    self._flusher.daemon = True
+                    self._flusher.start()
+                self._cond.notify_all()
+        for batch in batches:
+            self._send(*batch)
+        return future
+
+    def _take(self):
+        batch = (self._items, self._futures)
+        self._items = []
+        self._futures = []
+        self._bytes = 0
+        return batch
+
+    def _flush_expired(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self.closed:
+                        # close sends what's left
+                        return
+                    wait = None
+                    if self._items:
+                        wait = self._expires - monotonic()
+                        if wait <= 0:
+                            taken = self._take()
+                            break
+                    self._cond.wait(wait)
+            self._send(*taken)
+
+    def _send(self, items, futures):
+        headers = dict(self.kwargs.get('headers') or {})
+        headers.setdefault('Content-Type', self.encoder.content_type)
+        kwargs = dict(self.kwargs, headers=headers)
+        try:
+            # not AsyncFuturesSession's, the flusher has no event loop
+            request = FuturesSession.request(
+                self.session,
+                self.method,
+                self.url,
+                data=self.encoder.join(items),
+                **kwargs
+            )
+        except BaseException as e:
+            request = Future()
+            request.set_exception(e)
+        request.add_done_callback(partial(self._sent, len(items), futures))
+
+    def _sent(self, count, futures, request):
+        # resolved before they stop counting so close's drain covers them
+        for future in futures:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if request.cancelled():
+                future.set_exception(RuntimeError('batch was cancelled'))
+            elif request.exception() is not None:
+                future.set_exception(request.exception())
+            else:
+                future.set_result(request.result())
+        with self._cond:
+            self._outstanding -= count
+            self._cond.notify_all()
+
+    def flush(self):
+        """Sends the current batch now, whatever its size"""
+        with self._cond:
+            if not self._items:
+                return
+            taken = self._take()
+        self._send(*taken)
+
+    def close(self, timeout=None, cancel_futures=False):
+        """Sends anything that's buffered and waits up to `timeout` seconds
+        for all of the batches to complete. With `cancel_futures` what's
+        buffered is dropped, and its futures cancelled, instead."""
+        with self._cond:
+            self.closed = True
+            # lets the flusher go
+            self._cond.notify_all()
+            dropped = []
+            if cancel_futures and self._items:
+                items, dropped = self._take()
+                self._outstanding -= len(items)
+                self._cond.notify_all()
+        for future in dropped:
+            future.cancel()
+        self.flush()
+        with self._cond:
+            self._cond.wait_for(lambda: not self._outstanding, timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.cache
+~~~~~~~~~~~~~~~~~~~~~~
+
+Response caches for FuturesSession. Responses are stored according to their
+Cache-Control/Expires headers and served without using a worker while they're
+fresh. Stale responses with an ETag or Last-Modified are revalidated with a
+conditional request.
+
+    from requests_futures.cache import MemoryCache
+    from requests_futures.sessions import FuturesSession
+
+    cache = MemoryCache(max_entries=1000, max_bytes=64 * 1024 * 1024)
+    session = FuturesSession(cache=cache)
+    session.get('http://httpbin.org/cache/60').result()
+    # served from the cache
+    session.get('http://httpbin.org/cache/60').result()
+    print(cache.stats)
+
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+from os import listdir, makedirs, path, remove, replace
+from pickle import HIGHEST_PROTOCOL, UnpicklingError, dump, load
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+# https://www.rfc-editor.org/rfc/rfc9111#section-3
+CACHEABLE_STATUSES = frozenset((200, 203, 300, 301, 308, 404, 410))
+
+
+def parse_cache_control(headers):
+    """Parses a Cache-Control header into a dict of lowercase directives, ones
+    without a value map to True"""
+    directives = {}
+    for directive in headers.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or True
+    return directives
+
+
+def _seconds(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CacheStats(object):
+    """Counts of what a cache has been up to"""
+
+    __slots__ = (
+        'hits',
+        'misses',
+        'stale',
+        'revalidated',
+        'stores',
+        'evictions',
+    )
+
+    def __init__(self):
+        for attr in self.__slots__:
+            setattr(self, attr, 0)
+
+    def as_dict(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __repr__(self):
+        return 'CacheStats({})'.format(
+            ', '.join('{}={}'.format(k, v) for k, v in self.as_dict().items())
+        )
+
+
+class CacheEntry(object):
+    """A stored response along with what's needed to know when it's fresh
+    and how to revalidate it"""
+
+    def __init__(self, resp, vary, now=None):
+        self.status_code = resp.status_code
+        self.reason = resp.reason
+        self.url = resp.url
+        self.encoding = resp.encoding
+        self.headers = dict(resp.headers)
+        self.content = resp.content
+        # the request header values this response varies on
+        self.vary = vary
+        self.update(resp.headers, now)
+
+    def update(self, headers, now=None):
+        """Refreshes freshness info, and validators, from a response's, or a
+        304's, headers"""
+        now = time() if now is None else now
+        self.headers.update(
+            (k, v)
+            for k, v in headers.items()
+            if k.lower()
+            in ('cache-control', 'date', 'etag', 'expires', 'last-modified')
+        )
+        headers = CaseInsensitiveDict(self.headers)
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+
+        directives = parse_cache_control(headers)
+        lifetime = _seconds(directives.get('max-age'))
+        if lifetime is None and 'expires' in headers:
+            expires = _timestamp(headers['Expires'])
+            date = _timestamp(headers.get('Date')) or now
+            lifetime = max(expires - date, 0) if expires else 0
+        if 'no-cache' in directives:
+            lifetime = 0
+        self.expires = now + (lifetime or 0)
+        self.stale_while_revalidate = (
+            _seconds(directives.get('stale-while-revalidate')) or 0
+        )
+
+    @property
+    def size(self):
+        return len(self.content) + sum(
+            len(k) + len(v) for k, v in self.headers.items()
+        )
+
+    @property
+    def validators(self):
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def fresh(self, now=None):
+        return (time() if now is None else now) < self.expires
+
+    def usable_stale(self, now=None):
+        """True if the entry may be served while it's revalidated"""
+        now = time() if now is None else now
+        return now < self.expires + self.stale_while_revalidate
+
+    def matches(self, request_headers):
+        return all(request_headers.get(k) == v for k, v in self.vary.items())
+
+    def response(self, request=None):
+        resp = Response()
+        resp.status_code = self.status_code
+        resp.reason = self.reason
+        resp.url = self.url
+        resp.encoding = self.encoding
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.content
+        resp._content_consumed = True
+        resp.request = request
+        resp.from_cache = True
+        return resp
+
+    @classmethod
+    def from_response(cls, resp, request_headers, now=None):
+        """Returns an entry for `resp` or None if it can't be cached"""
+        if resp.request is None or resp.request.method != 'GET':
+            return None
+        if resp.status_code not in CACHEABLE_STATUSES:
+            return None
+        directives = parse_cache_control(resp.headers)
+        if 'no-store' in directives:
+            return None
+        vary = [
+            v.strip().lower()
+            for v in resp.headers.get('Vary', '').split(',')
+            if v.strip()
+        ]
+        if '*' in vary:
+            return None
+        entry = cls(resp, {k: request_headers.get(k) for k in vary}, now=now)
+        if not entry.fresh(now) and not entry.validators:
+            # never usable without a way to revalidate
+            return None
+        return entry
+
+
+class BaseCache(ABC):
+    """Interface for response cache backends, entries are keyed by strings"""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, key):
+        """Returns the CacheEntry for `key`, None if there isn't one"""
+
+    @abstractmethod
+    def set(self, key, entry):
+        """Stores `entry` as `key`, replacing any that's there"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Removes `key`, if it's there"""
+
+    @abstractmethod
+    def clear(self):
+        """Removes everything"""
+
+
+class MemoryCache(BaseCache):
+    """An in-process LRU cache bounded by entry count and, optionally, the
+    total size of stored content and headers"""
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        super(MemoryCache, self).__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+class FileCache(BaseCache):
+    """Stores entries as files in `directory`, one per key, so they're
+    shared between processes and survive restarts"""
+
+    def __init__(self, directory):
+        super(FileCache, self).__init__()
+        self.directory = directory
+        makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return path.join(
+            self.directory, sha256(key.encode('utf-8')).hexdigest()
+        )
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                return load(fh)
+        except OSError:
+            return None
+        except (
+            UnpicklingError,
+            EOFError,
+            ValueError,
+            AttributeError,
+            ImportError,
+        ):
+            # truncated, corrupt, or from a version that's gone, a miss and
+            # no use to anyone
+            self.delete(key)
+            return None
+
+    def set(self, key, entry):
+        # write then move into place so readers never see a partial entry
+        with NamedTemporaryFile(dir=self.directory, delete=False) as fh:
+            dump(entry, fh, HIGHEST_PROTOCOL)
+        replace(fh.name, self._path(key))
+        self.stats.stores += 1
+
+    def delete(self, key):
+        try:
+            remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in listdir(self.directory):
+            # only remove the files we made, named for the key's sha256
+            if len(name) == 64:
+                try:
+                    remove(path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
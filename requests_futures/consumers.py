@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.consumers
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Consumers process response bodies on the worker as they arrive rather than
+once they've been read in full. Pass one as a request's `consumer` and the
+Future resolves to what it makes of the body, only a chunk, or a line, is
+ever held in memory so feeds and exports of any size can be handled at
+network speed.
+
+    from requests_futures.consumers import NDJSONConsumer
+    from requests_futures.sessions import FuturesSession
+
+    session = FuturesSession()
+    future = session.get('https://example.com/export.ndjson',
+                         consumer=NDJSONConsumer(store))
+    print('{} records'.format(future.result()))
+
+"""
+
+import json
+from abc import ABC, abstractmethod
+
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ContentDecodingError
+from requests.exceptions import SSLError as RequestsSSLError
+from urllib3.exceptions import (
+    DecodeError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Consumer(ABC):
+    """Base class for consumers, `feed` is called with each chunk of the
+    body in turn and `close` once it's all arrived, what it returns is the
+    request's result.
+
+    Chunks are at most `chunk_size` bytes and are bytes-like objects that may
+    be reused once `feed` returns, copy anything that's needed beyond that.
+    """
+
+    chunk_size = CHUNK_SIZE
+
+    @abstractmethod
+    def feed(self, chunk):
+        """Handles the next chunk of the body"""
+
+    def close(self):
+        """Called once the whole body has been fed, returns the result"""
+        return None
+
+
+class LineConsumer(Consumer):
+    """Splits the body into lines, on `delimiter`, and calls `callback` with
+    each, without the delimiter, as bytes. A line left unfinished at the end
+    of the body is passed on too, empty lines are skipped. The result is the
+    number of lines handled.
+
+    Partial lines are carried over in a buffer that's reused from chunk to
+    chunk, lines longer than `max_line` bytes raise ValueError rather than
+    growing it without bound.
+    """
+
+    def __init__(
+        self, callback=None, delimiter=b'\n', max_line=16 * 1024 * 1024
+    ):
+        self.callback = callback
+        self.delimiter = delimiter
+        self.max_line = max_line
+        self.count = 0
+        self._partial = bytearray()
+
+    def feed(self, chunk):
+        if not isinstance(chunk, bytes):
+            chunk = bytes(chunk)
+        # slices of it without copies
+        view = memoryview(chunk)
+        partial = self._partial
+        delimiter = self.delimiter
+        start = 0
+        keep = min(len(delimiter) - 1, len(partial))
+        if keep:
+            # a delimiter may have been split between the chunks
+            edge = bytes(partial[-keep:]) + chunk[: len(delimiter) - 1]
+            i = edge.find(delimiter)
+            if 0 <= i < keep:
+                line = bytes(partial[: len(partial) - keep + i])
+                del partial[:]
+                start = i + len(delimiter) - keep
+                self._line(line)
+        while True:
+            end = chunk.find(delimiter, start)
+            if end < 0:
+                break
+            if partial:
+                partial += view[start:end]
+                line = bytes(partial)
+                # keeps its capacity for the next one
+                del partial[:]
+            else:
+                line = chunk[start:end]
+            start = end + len(delimiter)
+            self._line(line)
+        if start < len(chunk):
+            if len(partial) + len(chunk) - start > self.max_line:
+                raise ValueError(
+                    'line longer than {} bytes'.format(self.max_line)
+                )
+            partial += view[start:]
+
+    def _line(self, line):
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        if not line:
+            return
+        self.count += 1
+        self.line(line)
+
+    def line(self, line):
+        """Handles a line, calls `callback` by default"""
+        if self.callback is not None:
+            self.callback(line)
+
+    def close(self):
+        if self._partial:
+            line = bytes(self._partial)
+            del self._partial[:]
+            self._line(line)
+        return self.count
+
+
+class NDJSONConsumer(LineConsumer):
+    """Newline delimited JSON, `callback` is called with each record. The
+    result is the number of records."""
+
+    def __init__(self, callback=None, max_line=16 * 1024 * 1024):
+        super(NDJSONConsumer, self).__init__(callback, max_line=max_line)
+
+    def line(self, line):
+        record = json.loads(line)
+        if self.callback is not None:
+            self.callback(record)
+
+
+def _chunks(resp, chunk_size):
+    """Yields `resp`'s body in chunks of up to `chunk_size` bytes as they
+    arrive, raising the same errors `iter_content` would"""
+    raw = resp.raw
+    read1 = getattr(raw, 'read1', None)
+    if read1 is None:
+        # not urllib3, e.g. the HTTP/2 adapter
+        for chunk in resp.iter_content(chunk_size):
+            yield chunk
+        return
+    try:
+        while True:
+            # whatever's arrived, rather than waiting for a full chunk
+            chunk = read1(chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise RequestsConnectionError(e)
+    except SSLError as e:
+        raise RequestsSSLError(e)
+
+
+def consume(resp, consumer):
+    """Feeds `resp`'s body to `consumer` and returns its result.
+
+    Error responses aren't fed to it, their bodies are read and
+    `requests.exceptions.HTTPError` is raised instead.
+    """
+    try:
+        if not resp.ok:
+            # read it so that the error has it
+            resp.content
+            resp.raise_for_status()
+        for chunk in _chunks(resp, consumer.chunk_size):
+            consumer.feed(chunk)
+        return consumer.close()
+    finally:
+        resp.close()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.downloads
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Parallel ranged downloads for FuturesSession. The object is probed with a HEAD
+and, when the server supports ranges, fetched in parts through the session's
+executor with each part streamed straight to its place in the output file.
+Progress is kept in a sidecar file next to the output so that an interrupted
+download can pick up where it left off.
+
+    from requests_futures.sessions import FuturesSession
+
+    session = FuturesSession(max_workers=8)
+    future = session.download('https://example.com/big.iso', 'big.iso',
+                              checksum='sha256:9f86d08...')
+    future.result()
+
+"""
+
+import json
+from concurrent.futures import CancelledError, Future
+from functools import partial
+from hashlib import new as new_hash
+from os import path, remove, replace
+from threading import Lock, Thread
+
+from requests.exceptions import RequestException
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# suffix of the file that tracks a download's progress
+STATE_SUFFIX = '.download'
+
+
+class ChecksumError(IOError):
+    """A downloaded file didn't match its expected checksum"""
+
+
+class RangeError(RequestException):
+    """The server didn't answer a part's request with the range asked for"""
+
+
+def file_digest(filename, algorithm):
+    """Returns the hex digest of `filename`, reading it a chunk at a time"""
+    digest = new_hash(algorithm)
+    with open(filename, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE * 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PartWriter(object):
+    """A response hook that streams the body into `filename` at `offset`.
+
+    With a `length` the response must be a 206 for exactly that many bytes,
+    without one the file is truncated to whatever was written. Runs in the
+    worker so the body never has to be held in memory.
+    """
+
+    def __init__(self, filename, offset=0, length=None):
+        self.filename = filename
+        self.offset = offset
+        self.length = length
+
+    def __call__(self, resp, *args, **kwargs):
+        if resp.is_redirect:
+            # hooks run for every hop, the body's at the end of them
+            return resp
+        if self.length is not None and resp.status_code != 206:
+            resp.close()
+            raise RangeError(
+                'expected 206 for bytes {}-{}, got {}'.format(
+                    self.offset, self.offset + self.length - 1, resp.status_code
+                ),
+                response=resp,
+            )
+        resp.raise_for_status()
+        written = 0
+        with open(self.filename, 'r+b') as fh:
+            fh.seek(self.offset)
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                fh.write(chunk)
+                written += len(chunk)
+            if self.length is None:
+                fh.truncate(self.offset + written)
+        if self.length is not None and written != self.length:
+            raise RangeError(
+                'expected {} bytes at {}, got {}'.format(
+                    self.length, self.offset, written
+                ),
+                response=resp,
+            )
+        # the body's in the file, don't let anyone try to read it again
+        resp._content = b''
+        return resp
+
+
+class Download(object):
+    """Coordinates the requests for one download, `future` resolves to the
+    output filename once it's complete"""
+
+    def __init__(
+        self,
+        session,
+        url,
+        filename,
+        part_size=DEFAULT_PART_SIZE,
+        checksum=None,
+        resume=True,
+        kwargs=None,
+    ):
+        self.session = session
+        self.url = url
+        # where the HEAD ended up after any redirects
+        self.location = url
+        self.filename = filename
+        self.part_size = part_size
+        self.checksum = None
+        if checksum:
+            algorithm, _, expected = checksum.partition(':')
+            if not expected:
+                raise ValueError(
+                    'checksum must be algorithm:hexdigest, e.g. sha256:...'
+                )
+            # fail now rather than once everything's been downloaded
+            new_hash(algorithm)
+            self.checksum = (algorithm, expected.lower())
+        self.resume = resume
+        self.kwargs = dict(kwargs or {})
+        self.state_filename = filename + STATE_SUFFIX
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.state = None
+        self._parts = []
+        self._remaining = 0
+        self._lock = Lock()
+
+    def start(self):
+        kwargs = dict(self.kwargs, allow_redirects=True)
+        self.session.head(self.url, **kwargs).add_done_callback(self._headed)
+        return self.future
+
+    def _headed(self, head):
+        # not from the worker the HEAD ran on, with max_pending the parts can
+        # wait for slots that only free up once workers get to the others
+        Thread(target=self._probed, args=(head,), daemon=True).start()
+
+    def _request(self, writer, headers=None):
+        kwargs = dict(self.kwargs, stream=True)
+        hooks = dict(kwargs.get('hooks') or {})
+        response_hooks = hooks.get('response', [])
+        if callable(response_hooks):
+            response_hooks = [response_hooks]
+        # ours goes first so that later hooks see the body's been consumed
+        hooks['response'] = [writer] + list(response_hooks)
+        kwargs['hooks'] = hooks
+        if headers:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **headers)
+        return self.session.get(self.location, **kwargs)
+
+    def _fail(self, e):
+        with self._lock:
+            if self.future.done():
+                return
+            parts = list(self._parts)
+            self.future.set_exception(e)
+        for part in parts:
+            part.cancel()
+
+    def _probed(self, head):
+        try:
+            resp = head.result()
+            ranged = (
+                resp.status_code == 200
+                and resp.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                and 'Content-Encoding' not in resp.headers
+                and resp.headers.get('Content-Length', '').isdigit()
+            )
+            if not ranged:
+                self._single()
+                return
+            self.location = resp.url
+            size = int(resp.headers['Content-Length'])
+            if size <= self.part_size:
+                # nothing to split up
+                self._single()
+                return
+            self._ranged(
+                {
+                    'url': self.location,
+                    'size': size,
+                    'part_size': self.part_size,
+                    'etag': resp.headers.get('ETag'),
+                    'last_modified': resp.headers.get('Last-Modified'),
+                    'done': [],
+                }
+            )
+        except BaseException as e:
+            self._fail(e)
+
+    def _single(self):
+        """Fetches the whole thing in one go, for small objects and servers
+        that won't do ranges"""
+        with open(self.filename, 'wb'):
+            pass
+        self._remaining = 1
+        part = self._request(PartWriter(self.filename))
+        self._parts.append(part)
+        part.add_done_callback(self._part_done)
+
+    def _load_state(self, state):
+        """Returns the parts already done by an earlier attempt at the same
+        download"""
+        if not self.resume or not path.exists(self.filename):
+            return []
+        try:
+            with open(self.state_filename) as fh:
+                saved = json.load(fh)
+        except (OSError, ValueError):
+            return []
+        if any(
+            saved.get(k) != state[k]
+            for k in ('url', 'size', 'part_size', 'etag', 'last_modified')
+        ):
+            # something's changed, start over
+            return []
+        return saved.get('done', [])
+
+    def _save_state(self):
+        tmp = self.state_filename + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.state, fh)
+        replace(tmp, self.state_filename)
+
+    def _ranged(self, state):
+        size = state['size']
+        done = set(self._load_state(state))
+        state['done'] = sorted(done)
+        self.state = state
+
+        # preallocate, keeping what's there if we're resuming
+        mode = 'r+b' if done else 'wb'
+        with open(self.filename, mode) as fh:
+            fh.truncate(size)
+        self._save_state()
+
+        validator = state['last_modified']
+        if state['etag'] and not state['etag'].startswith('W/'):
+            # If-Range needs a strong validator
+            validator = state['etag']
+        todo = []
+        for index, offset in enumerate(range(0, size, self.part_size)):
+            if index not in done:
+                todo.append((index, offset, min(self.part_size, size - offset)))
+        if not todo:
+            self._finish()
+            return
+        self._remaining = len(todo)
+        for index, offset, length in todo:
+            if self.future.done():
+                # an earlier part has already failed
+                break
+            headers = {
+                'Range': 'bytes={}-{}'.format(offset, offset + length - 1)
+            }
+            if validator:
+                # a 200 with the new version rather than a part of the old
+                headers['If-Range'] = validator
+            part = self._request(
+                PartWriter(self.filename, offset, length), headers
+            )
+            with self._lock:
+                self._parts.append(part)
+            part.add_done_callback(partial(self._part_done, index=index))
+
+    def _part_done(self, part, index=None):
+        if part.cancelled():
+            # by us after a failure, or the session closing
+            self._fail(CancelledError())
+            return
+        e = part.exception()
+        if e is not None:
+            self._fail(e)
+            return
+        with self._lock:
+            if index is not None:
+                # saved even if another part's failed, for resuming
+                self.state['done'].append(index)
+                self._save_state()
+            if self.future.done():
+                return
+            self._remaining -= 1
+            finished = not self._remaining
+        if finished:
+            try:
+                self._finish()
+            except BaseException as e:
+                self._fail(e)
+
+    def _finish(self):
+        if self.checksum is None:
+            self._complete()
+            return
+        algorithm, _ = self.checksum
+        # hashing a big file is work, do it in the executor too
+        self.session.executor.submit(
+            file_digest, self.filename, algorithm
+        ).add_done_callback(self._verify)
+
+    def _verify(self, digest):
+        try:
+            algorithm, expected = self.checksum
+            actual = digest.result()
+            if actual != expected:
+                # no point resuming from something that's wrong
+                self._forget()
+                raise ChecksumError(
+                    '{} {}: expected {}, got {}'.format(
+                        self.filename, algorithm, expected, actual
+                    )
+                )
+            self._complete()
+        except BaseException as e:
+            self._fail(e)
+
+    def _forget(self):
+        try:
+            remove(self.state_filename)
+        except FileNotFoundError:
+            pass
+
+    def _complete(self):
+        self._forget()
+        with self._lock:
+            if not self.future.done():
+                self.future.set_result(self.filename)
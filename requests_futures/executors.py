@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.executors
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Executors for FuturesSession. `PriorityThreadPoolExecutor` runs the highest
+priority pending work next rather than the oldest, with aging so that low
+priority work still gets its turn. `parallel_backend` works out how this
+interpreter can run Python code in parallel.
+
+    from requests_futures.executors import PriorityThreadPoolExecutor
+    from requests_futures.sessions import FuturesSession
+
+    session = FuturesSession(executor=PriorityThreadPoolExecutor(16))
+    # queued behind any background work
+    sync = [session.get(url, priority=-1) for url in urls]
+    # jumps the queue
+    session.get('http://httpbin.org/get', priority=10).result()
+
+"""
+
+import sys
+from concurrent.futures import Executor, Future
+from functools import partial
+from heapq import heapify, heappop, heappush
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+from weakref import WeakSet
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    # Python < 3.14
+    InterpreterPoolExecutor = None
+
+# priority points gained per second spent queued
+DEFAULT_AGING = 1.0
+
+# how a FuturesSession's requests are run
+THREADS = 'threads'
+FREE_THREADED = 'free-threaded'
+INTERPRETERS = 'interpreters'
+PROCESSES = 'processes'
+
+
+def gil_disabled():
+    """True on a free-threaded build of Python running without the GIL"""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def parallel_backend(interpreters=True):
+    """Returns the cheapest way to run Python code in parallel here.
+
+    Threads already are on a free-threaded build without the GIL,
+    `FREE_THREADED`. Otherwise, on Python 3.14+ and when `interpreters` is
+    allowed, `INTERPRETERS` for an InterpreterPoolExecutor. Failing that
+    there's nothing better than `THREADS`, processes aside.
+    """
+    if gil_disabled():
+        return FREE_THREADED
+    if interpreters and InterpreterPoolExecutor is not None:
+        return INTERPRETERS
+    return THREADS
+
+
+def priority_key(priority, aging, now=None):
+    """Returns a sort key, lowest first, for work of `priority` queued at
+    `now`. Waiting `n` seconds is worth `aging * n` priority points."""
+    now = monotonic() if now is None else now
+    return aging * now - priority
+
+
+class _WorkItem(object):
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'queued', 'discarded')
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.queued = True
+        # counted as cancelled by the queue
+        self.discarded = False
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+        # don't hold on to the result or arguments
+        self.future = self.fn = self.args = self.kwargs = None
+
+
+class _PriorityQueue(object):
+    """A heap of work items. Cancelled items are left where they are and
+    skipped when they come up, the heap is rebuilt without them once they
+    make up half of it."""
+
+    def __init__(self, aging):
+        self.aging = aging
+        self._heap = []
+        self._seq = count()
+        self._cancelled = 0
+        self._cond = Condition()
+        self.closed = False
+        self.waiting = 0
+
+    def qsize(self):
+        with self._cond:
+            return len(self._heap) - self._cancelled
+
+    def empty(self):
+        return not self.qsize()
+
+    def put(self, priority, item):
+        with self._cond:
+            heappush(
+                self._heap,
+                (priority_key(priority, self.aging), next(self._seq), item),
+            )
+            self._cond.notify()
+
+    def get(self):
+        """Returns the next item, blocking until there is one, or None once
+        the queue is closed and empty"""
+        with self._cond:
+            while True:
+                while self._heap:
+                    item = heappop(self._heap)[2]
+                    item.queued = False
+                    if item.discarded:
+                        self._cancelled -= 1
+                        continue
+                    return item
+                if self.closed:
+                    return None
+                self.waiting += 1
+                try:
+                    self._cond.wait()
+                finally:
+                    self.waiting -= 1
+
+    def discard(self, item, future):
+        if not future.cancelled():
+            return
+        with self._cond:
+            if not item.queued:
+                return
+            item.discarded = True
+            self._cancelled += 1
+            if self._cancelled * 2 > len(self._heap):
+                heap = []
+                for entry in self._heap:
+                    if entry[2].discarded:
+                        entry[2].queued = False
+                    else:
+                        heap.append(entry)
+                heapify(heap)
+                self._heap = heap
+                self._cancelled = 0
+
+    def close(self, cancel=False):
+        with self._cond:
+            self.closed = True
+            if cancel:
+                items = [entry[2] for entry in self._heap]
+                self._heap = []
+                self._cancelled = 0
+            else:
+                items = []
+            self._cond.notify_all()
+        for item in items:
+            item.queued = False
+            item.future.cancel()
+
+
+class PriorityThreadPoolExecutor(Executor):
+    """A thread pool whose workers take the highest priority pending work.
+
+    Work submitted with `submit` has priority 0, `submit_priority` takes
+    any number, higher runs sooner. Work gains `aging` priority for each
+    second it's queued so nothing waits forever, 0 disables aging. Work with
+    the same effective priority runs in the order it was submitted.
+
+    Cancelling queued work is cheap, it's skipped rather than searched for.
+    """
+
+    def __init__(
+        self, max_workers=8, aging=DEFAULT_AGING, thread_name_prefix=''
+    ):
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        self._max_workers = max_workers
+        self.aging = aging
+        self._thread_name_prefix = (
+            thread_name_prefix
+            or 'PriorityThreadPoolExecutor-{}'.format(id(self))
+        )
+        self._work_queue = _PriorityQueue(aging)
+        self._threads = WeakSet()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_priority(0, fn, *args, **kwargs)
+
+    def submit_priority(self, priority, fn, *args, **kwargs):
+        """Submits `fn` to run with `priority`, higher runs sooner
+
+        :rtype : concurrent.futures.Future
+        """
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future = Future()
+        item = _WorkItem(future, fn, args, kwargs)
+        future.add_done_callback(partial(self._work_queue.discard, item))
+        self._work_queue.put(priority, item)
+        self._adjust_thread_count()
+        return future
+
+    def _adjust_thread_count(self):
+        queue = self._work_queue
+        if queue.waiting >= queue.qsize():
+            return
+        if len(self._threads) >= self._max_workers:
+            return
+        thread = Thread(
+            name='{}_{}'.format(self._thread_name_prefix, len(self._threads)),
+            target=_worker,
+            args=(queue,),
+            daemon=True,
+        )
+        thread.start()
+        self._threads.add(thread)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._shutdown = True
+        self._work_queue.close(cancel_futures)
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+
+
+def _worker(queue):
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        item.run()
+        del item
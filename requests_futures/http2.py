@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.http2
+~~~~~~~~~~~~~~~~~~~~~~
+
+An HTTP/2 transport adapter built on httpx, `pip install
+requests-futures[http2]`. Concurrent requests to a host are sent as streams
+multiplexed over a few connections rather than each needing a connection of
+its own, servers that don't speak HTTP/2 are talked to over HTTP/1.1.
+
+    from requests_futures.http2 import HTTP2Adapter
+    from requests_futures.sessions import FuturesSession
+
+    session = FuturesSession(max_workers=256)
+    session.mount('https://api.example.com', HTTP2Adapter())
+    futures = [session.get('https://api.example.com/items/{}'.format(i))
+               for i in range(1000)]
+
+"""
+
+import ssl
+from http.client import HTTPMessage
+from os import path
+from threading import Lock
+
+from requests.adapters import BaseAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError,
+    ConnectTimeout,
+    ContentDecodingError,
+    InvalidSchema,
+    InvalidURL,
+    ProxyError,
+    ReadTimeout,
+    SSLError,
+)
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import (
+    DEFAULT_CA_BUNDLE_PATH,
+    get_encoding_from_headers,
+    select_proxy,
+)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# connection specific headers that HTTP/2 doesn't allow
+_HOP_BY_HOP = frozenset(
+    (
+        'connection',
+        'keep-alive',
+        'proxy-connection',
+        'transfer-encoding',
+        'upgrade',
+    )
+)
+
+
+def _ssl_context(verify, cert):
+    """Builds the SSLContext for requests' `verify` and `cert` settings"""
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif isinstance(verify, str):
+        if path.isdir(verify):
+            context = ssl.create_default_context(capath=verify)
+        else:
+            context = ssl.create_default_context(cafile=verify)
+    else:
+        context = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+    if cert:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+    return context
+
+
+def _timeout(timeout):
+    """Converts a requests timeout, a number or (connect, read) tuple, into
+    an httpx one"""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _request_error(e, request):
+    """The requests exception for an httpx one raised sending `request`"""
+    if isinstance(e, httpx.ConnectTimeout):
+        return ConnectTimeout(e, request=request)
+    if isinstance(e, httpx.TimeoutException):
+        return ReadTimeout(e, request=request)
+    if isinstance(e, httpx.ProxyError):
+        return ProxyError(e, request=request)
+    if isinstance(e, httpx.UnsupportedProtocol):
+        return InvalidSchema(e, request=request)
+    if isinstance(e, httpx.InvalidURL):
+        return InvalidURL(e, request=request)
+    if isinstance(e.__context__, ssl.SSLError) or 'SSL' in str(e):
+        return SSLError(e, request=request)
+    return ConnectionError(e, request=request)
+
+
+class HTTP2Body(object):
+    """Stands in for the urllib3 response requests normally reads bodies
+    from, `Response.raw`"""
+
+    def __init__(self, response):
+        self.response = response
+        self.http_version = response.http_version
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = CaseInsensitiveDict(response.headers.items())
+        # what requests.cookies reads Set-Cookie headers from
+        self._original_response = _OriginalResponse(response.headers)
+        self._chunks = None
+        self._buffer = b''
+
+    def stream(self, chunk_size=None, decode_content=True):
+        chunks = (
+            self.response.iter_bytes(chunk_size)
+            if decode_content
+            else self.response.iter_raw(chunk_size)
+        )
+        try:
+            for chunk in chunks:
+                yield chunk
+        except httpx.DecodingError as e:
+            raise ContentDecodingError(e)
+        except httpx.TimeoutException as e:
+            raise ConnectionError(e)
+        except httpx.TransportError as e:
+            raise ChunkedEncodingError(e)
+
+    def read(self, amt=None, decode_content=True):
+        if self._chunks is None:
+            self._chunks = self.stream(decode_content=decode_content)
+        if amt is None:
+            data = self._buffer + b''.join(self._chunks)
+            self._buffer = b''
+            return data
+        while len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self.response.close()
+
+    def release_conn(self):
+        self.response.close()
+
+
+class _OriginalResponse(object):
+    def __init__(self, headers):
+        self.msg = HTTPMessage()
+        for name, value in headers.multi_items():
+            self.msg[name] = value
+
+    def info(self):
+        return self.msg
+
+
+class HTTP2Adapter(BaseAdapter):
+    """A transport adapter that speaks HTTP/2, requires httpx[http2].
+
+    Requests from any number of threads share connections, each request a
+    stream on one, and new connections are only opened once servers won't
+    take more streams, up to `max_connections` in total. Up to
+    `max_keepalive_connections` are kept around for `keepalive_expiry`
+    seconds once idle.
+
+    Servers are asked for HTTP/2 during the TLS handshake and those that
+    don't support it get HTTP/1.1. Plain `http://` uses HTTP/1.1 unless
+    `http1` is False, in which case HTTP/2 is assumed, prior knowledge, and
+    HTTP/1.1 isn't used at all.
+
+    `Response.raw` is an `HTTP2Body` whose `http_version` says which was
+    used.
+    """
+
+    __attrs__ = [
+        'max_connections',
+        'max_keepalive_connections',
+        'keepalive_expiry',
+        'http1',
+    ]
+
+    def __init__(
+        self,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=5.0,
+        http1=True,
+    ):
+        if httpx is None:
+            raise ImportError(
+                'HTTP2Adapter requires httpx[http2], pip install '
+                'requests-futures[http2]'
+            )
+        super(HTTP2Adapter, self).__init__()
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http1 = http1
+        # a client per TLS and proxy configuration
+        self._clients = {}
+        self._lock = Lock()
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for attr in self.__attrs__}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def client(self, verify=True, cert=None, proxy=None):
+        """Returns the httpx Client for requests with these settings"""
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = httpx.Client(
+                    http1=self.http1,
+                    http2=True,
+                    verify=_ssl_context(verify, cert),
+                    proxy=proxy,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=(
+                            self.max_keepalive_connections
+                        ),
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    # requests has already taken care of these
+                    trust_env=False,
+                    follow_redirects=False,
+                )
+            return client
+
+    def send(
+        self,
+        request,
+        stream=False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ):
+        client = self.client(verify, cert, select_proxy(request.url, proxies))
+        headers = [
+            (name, value)
+            for name, value in request.headers.items()
+            if name.lower() not in _HOP_BY_HOP
+        ]
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        try:
+            resp = client.send(
+                client.build_request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=body,
+                    timeout=_timeout(timeout),
+                ),
+                stream=True,
+            )
+        except httpx.HTTPError as e:
+            raise _request_error(e, request)
+        return self.build_response(request, resp)
+
+    def build_response(self, req, resp):
+        """Wraps the httpx response `resp` in a requests Response"""
+        response = Response()
+        response.status_code = resp.status_code
+        response.raw = HTTP2Body(resp)
+        response.headers = response.raw.headers
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = resp.reason_phrase
+        response.url = req.url
+        response.request = req
+        response.connection = self
+        extract_cookies_to_jar(response.cookies, req, response.raw)
+        return response
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
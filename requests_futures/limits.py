@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.limits
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Policies that control how hard a FuturesSession pushes on the servers it
+talks to.
+
+"""
+
+from threading import Lock
+from time import monotonic
+
+from requests.exceptions import ConnectionError, Timeout
+
+
+class AIMDLimiter(object):
+    """Adapts a concurrency limit to how upstreams are coping, additive
+    increase/multiplicative decrease style.
+
+    Each successful request that completes while at least half of the limit
+    is in use grows the limit by `1 / limit`, so roughly one per limit's
+    worth of requests. Each failure, an exception or a 429/5xx response, or
+    response slower than `latency_threshold` seconds multiplies it by
+    `backoff_ratio`. The limit always stays between `min_limit` and
+    `max_limit`.
+
+    Callables in `listeners` are called with the new limit whenever it
+    changes.
+    """
+
+    def __init__(
+        self,
+        initial=8,
+        min_limit=1,
+        max_limit=64,
+        backoff_ratio=0.9,
+        latency_threshold=None,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(
+                'limits must satisfy 1 <= min_limit <= initial <= max_limit'
+            )
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self.listeners = []
+        self._limit = float(initial)
+        self._lock = Lock()
+
+    @property
+    def limit(self):
+        """The current limit on in-flight requests"""
+        return int(self._limit)
+
+    def record(self, latency, in_flight, failed):
+        """Adjusts the limit based on a completed request, `in_flight` is the
+        number of requests that were in flight alongside it"""
+        slow = (
+            self.latency_threshold is not None
+            and latency > self.latency_threshold
+        )
+        with self._lock:
+            before = self.limit
+            if failed or slow:
+                self._limit = max(
+                    self._limit * self.backoff_ratio, self.min_limit
+                )
+            elif in_flight * 2 >= self._limit:
+                # only grow when the current limit is actually being used
+                self._limit = min(
+                    self._limit + 1.0 / self._limit, self.max_limit
+                )
+            after = self.limit
+        if after != before:
+            for listener in self.listeners:
+                listener(after)
+
+    def __repr__(self):
+        return 'AIMDLimiter(limit={}, min_limit={}, max_limit={})'.format(
+            self.limit, self.min_limit, self.max_limit
+        )
+
+
+class TokenBucket(object):
+    """Allows an average of `rate` requests per second with bursts of up to
+    `burst` requests.
+
+    `wait` says how long until a request may be made and `consume` takes the
+    token for one. `pause` stops requests for a while, e.g. for a 429's
+    Retry-After.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        # tokens accrue from here on, may be in the future while paused
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self.rate, self.burst
+            )
+            self._updated = now
+
+    def wait(self, now=None):
+        """Returns the number of seconds until a token is available, 0 if one
+        is now"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            return max(self._updated - now, 0) + (
+                max(1 - self._tokens, 0) / self.rate
+            )
+
+    def consume(self, now=None):
+        """Takes a token, callers are expected to have `wait`ed for it"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            self._tokens -= 1
+
+    def pause(self, seconds, now=None):
+        """Holds off all requests for `seconds`, after which one may be made
+        and the bucket refills as normal"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            until = now + seconds
+            if until > self._updated:
+                self._updated = until
+                self._tokens = 1.0
+
+    def __repr__(self):
+        return 'TokenBucket(rate={}, burst={})'.format(self.rate, self.burst)
+
+
+class DeadlineExceeded(Timeout):
+    """Raised, without a request being made, once a request's deadline has
+    passed"""
+
+
+class Deadline(object):
+    """A point `seconds` from now by which requests must be done. One can
+    be shared by any number of requests, e.g. all of a `map`'s."""
+
+    def __init__(self, seconds):
+        self.expires = monotonic() + seconds
+
+    def remaining(self, now=None):
+        """Returns the number of seconds left, 0 once it's passed"""
+        now = monotonic() if now is None else now
+        return max(self.expires - now, 0)
+
+    @property
+    def expired(self):
+        return not self.remaining()
+
+    def __repr__(self):
+        return 'Deadline(remaining={:.3f})'.format(self.remaining())
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised, without a request being made, for a host whose circuit is
+    open"""
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'failures', 'opened', 'probes', 'successes')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = None
+        self.probes = 0
+        self.successes = 0
+
+
+class CircuitBreaker(object):
+    """Tracks the health of hosts and stops requests to those that are down.
+
+    A host's circuit opens after `failure_threshold` failures in a row and
+    requests to it fail immediately. After `recovery_timeout` seconds it's
+    half-open and up to `half_open_probes` requests at a time are let through
+    as probes. That many succeeding closes it again, any failing re-opens
+    it.
+
+    Callables in `listeners` are called with the host's key and its new
+    state whenever it changes.
+    """
+
+    def __init__(
+        self, failure_threshold=5, recovery_timeout=30, half_open_probes=1
+    ):
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1')
+        if half_open_probes < 1:
+            raise ValueError('half_open_probes must be at least 1')
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.listeners = []
+        self._circuits = {}
+        self._lock = Lock()
+
+    def _state(self, circuit, now):
+        if (
+            circuit.state == OPEN
+            and now - circuit.opened >= self.recovery_timeout
+        ):
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+            circuit.successes = 0
+        return circuit.state
+
+    def state(self, key, now=None):
+        """Returns the state of `key`'s circuit, `closed`, `open`, or
+        `half_open`"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return CLOSED if circuit is None else self._state(circuit, now)
+
+    def states(self, now=None):
+        """Returns the state of every circuit that isn't closed"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            states = {
+                key: self._state(circuit, now)
+                for key, circuit in self._circuits.items()
+            }
+        return {k: v for k, v in states.items() if v != CLOSED}
+
+    def allow(self, key, now=None):
+        """Returns False if a request to `key` shouldn't be made, otherwise
+        the state it's being made in, to be passed on to `record`"""
+        now = monotonic() if now is None else now
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+            state = self._state(circuit, now)
+            if state == OPEN:
+                return False
+            if state == HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    return False
+                circuit.probes += 1
+            return state
+
+    def record(self, key, allowed, failed, now=None):
+        """Records the outcome of a request `allow` let through in state
+        `allowed`. `failed` is None if there's no verdict, e.g. it was
+        cancelled."""
+        now = monotonic() if now is None else now
+        changed = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if allowed == HALF_OPEN and circuit is not None:
+                circuit.probes -= 1
+                if circuit.state == HALF_OPEN and failed is not None:
+                    if failed:
+                        changed = self._open(circuit, now)
+                    else:
+                        circuit.successes += 1
+                        if circuit.successes >= self.half_open_probes:
+                            del self._circuits[key]
+                            changed = CLOSED
+            else:
+                if circuit is None:
+                    if not failed:
+                        # nothing to note about a healthy host
+                        return
+                    circuit = self._circuits[key] = _Circuit()
+                # outcomes of requests made before it opened are old news
+                if circuit.state == CLOSED:
+                    if failed:
+                        circuit.failures += 1
+                        if circuit.failures >= self.failure_threshold:
+                            changed = self._open(circuit, now)
+                    elif failed is not None:
+                        del self._circuits[key]
+        if changed is not None:
+            for listener in self.listeners:
+                listener(key, changed)
+
+    def _open(self, circuit, now):
+        circuit.state = OPEN
+        circuit.opened = now
+        circuit.failures = 0
+        return OPEN
+
+    def reset(self):
+        """Closes every circuit"""
+        with self._lock:
+            self._circuits.clear()
+
+    def __repr__(self):
+        return (
+            'CircuitBreaker(failure_threshold={}, recovery_timeout={})'.format(
+                self.failure_threshold, self.recovery_timeout
+            )
+        )
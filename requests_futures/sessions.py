@@ -20,13 +20,66 @@ releases of python.
 
 """
 
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+from collections import Counter, OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from functools import partial
+from heapq import heappop, heappush
+from itertools import count
 from logging import getLogger
 from pickle import PickleError, dumps
+from threading import (
+    BoundedSemaphore,
+    Condition,
+    Lock,
+    Thread,
+    current_thread,
+    local,
+)
+from time import monotonic, time
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary, WeakSet
+
+from requests import Response, Session
+from requests.adapters import DEFAULT_POOLSIZE
+from requests.exceptions import ConnectionError, RetryError, Timeout
+from requests.models import PreparedRequest
+from requests.sessions import merge_setting
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import InvalidHeader, MaxRetryError
+from urllib3.util.retry import Retry
 
-from requests import Session
-from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from .adapters import DNSCache, FuturesHTTPAdapter, reset_timings, timings
+from .cache import CacheEntry
+from .consumers import consume
+from .downloads import DEFAULT_PART_SIZE, Download
+from .executors import (
+    DEFAULT_AGING,
+    FREE_THREADED,
+    INTERPRETERS,
+    PROCESSES,
+    THREADS,
+    InterpreterPoolExecutor,
+    PriorityThreadPoolExecutor,
+    gil_disabled,
+    parallel_backend,
+    priority_key,
+)
+from .limits import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    TokenBucket,
+)
+from .shared import SharedResources, registry
 
 
 def wrap(self, sup, background_callback, *args_, **kwargs_):
@@ -35,12 +88,1098 @@ def wrap(self, sup, background_callback, *args_, **kwargs_):
     return background_callback(self, resp) or resp
 
 
+def _clone_adapter(adapter):
+    """Returns a copy of `adapter` with the same settings but its own
+    connection pools"""
+    if not hasattr(adapter, '__getstate__') or not hasattr(
+        adapter, '__setstate__'
+    ):
+        return adapter
+    clone = type(adapter).__new__(type(adapter))
+    # HTTPAdapter's __setstate__ builds a new pool manager
+    clone.__setstate__(dict(adapter.__getstate__()))
+    return clone
+
+
+def _delegated(name):
+    return property(
+        lambda self: getattr(self.template, name),
+        lambda self, value: setattr(self.template, name, value),
+    )
+
+
+class _ThreadSession(Session):
+    """A worker thread's own session. It has its own cookie jar and copies
+    of `template`'s adapters, so its own connection pools, but reads all of
+    its other settings from `template` as it goes."""
+
+    headers = _delegated('headers')
+    auth = _delegated('auth')
+    proxies = _delegated('proxies')
+    hooks = _delegated('hooks')
+    params = _delegated('params')
+    stream = _delegated('stream')
+    verify = _delegated('verify')
+    cert = _delegated('cert')
+    max_redirects = _delegated('max_redirects')
+    trust_env = _delegated('trust_env')
+
+    def __init__(self, template):
+        # not calling Session.__init__, it would overwrite the template's
+        # settings
+        self.template = template
+        self.cookies = template.cookies.copy()
+        self.adapters = OrderedDict()
+        # those that can't be cloned are shared with the template
+        self._cloned = []
+        for prefix, adapter in template.adapters.items():
+            clone = _clone_adapter(adapter)
+            if clone is not adapter:
+                self._cloned.append(clone)
+            self.adapters[prefix] = clone
+
+    def close(self):
+        """Closes its own adapters, leaving those it shares with the
+        template alone"""
+        for adapter in self._cloned:
+            adapter.close()
+
+
+# the long-lived session of a `use_processes` worker process, or `parallel`
+# worker interpreter
+_worker_session = None
+
+
+def _init_worker_session(session):
+    """ProcessPoolExecutor and InterpreterPoolExecutor initializer, sets up
+    the worker's session once"""
+    global _worker_session
+    _worker_session = session
+
+
+def _worker_request(background_callback, *args, **kwargs):
+    """Runs a request on the worker's session, only the request arguments
+    and callback cross the process, or interpreter, boundary"""
+    session = _worker_session
+    if isinstance(session, FuturesSession):
+        # a pickled FuturesSession comes across without its executor
+        resp = Session.request(session, *args, **kwargs)
+    else:
+        resp = session.request(*args, **kwargs)
+    if background_callback:
+        return background_callback(session, resp) or resp
+    return resp
+
+
+class RequestTimings(object):
+    """Where the time went for a request, in seconds.
+
+    * `queued` between `request` and a worker picking it up
+    * `pool_wait` waiting for a pooled connection
+    * `connect` opening new connections, including TLS
+    * `ttfb` sending the request through receiving the response headers,
+      includes `pool_wait` and `connect`
+    * `read` reading the body and running hooks
+    * `total` all of the above
+
+    The pool and connect times are None unless the request went through a
+    `FuturesHTTPAdapter`, as FuturesSession's own do. All but `queued` and
+    `total` are None for requests that raised.
+    """
+
+    __slots__ = (
+        'method',
+        'url',
+        'status_code',
+        'exception',
+        'submitted',
+        'started',
+        'finished',
+        'pool_wait',
+        'connect',
+        'ttfb',
+    )
+
+    def __init__(self, method, url, submitted, started=None, finished=None):
+        self.method = method
+        self.url = url
+        self.submitted = submitted
+        self.started = started
+        self.finished = finished
+        self.status_code = None
+        self.exception = None
+        self.pool_wait = None
+        self.connect = None
+        self.ttfb = None
+
+    @property
+    def queued(self):
+        if self.started is None:
+            return None
+        return self.started - self.submitted
+
+    @property
+    def read(self):
+        if self.ttfb is None:
+            return None
+        return max(self.finished - self.started - self.ttfb, 0)
+
+    @property
+    def total(self):
+        if self.finished is None:
+            return None
+        return self.finished - self.submitted
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'url': self.url,
+            'status_code': self.status_code,
+            'queued': self.queued,
+            'pool_wait': self.pool_wait,
+            'connect': self.connect,
+            'ttfb': self.ttfb,
+            'read': self.read,
+            'total': self.total,
+        }
+
+    def __repr__(self):
+        return 'RequestTimings({})'.format(
+            ', '.join('{}={}'.format(k, v) for k, v in self.as_dict().items())
+        )
+
+
+class _Gauge(object):
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def add(self, n):
+        with self._lock:
+            self.value += n
+
+
+def _method_url(args, kwargs):
+    method = args[0] if args else kwargs.get('method')
+    url = args[1] if len(args) > 1 else kwargs.get('url')
+    return method, url
+
+
+class TimedResponse(Response):
+    """A Response that keeps its `timings` when it's pickled"""
+
+    def __getstate__(self):
+        # on top of Response's, whatever callbacks may have added to them
+        state = super(TimedResponse, self).__getstate__()
+        state['timings'] = getattr(self, 'timings', None)
+        return state
+
+
+def _picklable(obj):
+    try:
+        dumps(obj)
+    except (TypeError, PickleError, AttributeError):
+        return False
+    return True
+
+
+def _timed(func, submitted, active, *args, **kwargs):
+    """Runs `func` in a worker, attaching a RequestTimings to the response
+    it returns"""
+    started = time()
+    reset_timings()
+    if active is not None:
+        active.add(1)
+    try:
+        resp = func(*args, **kwargs)
+    finally:
+        if active is not None:
+            active.add(-1)
+    if isinstance(resp, Response):
+        method, url = _method_url(args, kwargs)
+        resp.timings = t = RequestTimings(
+            method, url, submitted, started, time()
+        )
+        t.status_code = resp.status_code
+        t.ttfb = resp.elapsed.total_seconds()
+        if isinstance(resp.connection, FuturesHTTPAdapter):
+            t.pool_wait = timings.pool_wait
+            t.connect = timings.connect
+        if type(resp) is Response:
+            # make sure the timings survive the trip back from a process
+            # worker
+            resp.__class__ = TimedResponse
+    return resp
+
+
+# Session.request's timeout argument, when it's passed positionally
+_TIMEOUT_ARG = 8
+
+
+def _as_deadline(value):
+    """A Deadline for `value`, seconds from now, unless it already is one"""
+    if value is None or isinstance(value, Deadline):
+        return value
+    return Deadline(value)
+
+
+def _deadline_exceeded():
+    return DeadlineExceeded('deadline passed before the request was sent')
+
+
+def _bounded_timeout(timeout, remaining):
+    """Cuts `timeout`, a number, (connect, read) tuple, or None, down to
+    `remaining` seconds"""
+    if isinstance(timeout, tuple):
+        return tuple(
+            remaining if t is None else min(t, remaining) for t in timeout
+        )
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _deadlined(func, deadline, *args, **kwargs):
+    """Runs `func` in a worker, with its timeouts cut to what's left of
+    `deadline`, unless it has already passed"""
+    remaining = deadline.remaining()
+    if not remaining:
+        raise _deadline_exceeded()
+    if len(args) > _TIMEOUT_ARG:
+        args = list(args)
+        args[_TIMEOUT_ARG] = _bounded_timeout(args[_TIMEOUT_ARG], remaining)
+    else:
+        kwargs['timeout'] = _bounded_timeout(kwargs.get('timeout'), remaining)
+    return func(*args, **kwargs)
+
+
+# Session.request's stream argument, when it's passed positionally
+_STREAM_ARG = 12
+
+
+class _Consuming(object):
+    """Runs a request in a worker, streamed, and feeds its body to
+    `consumer` as it arrives"""
+
+    def __init__(self, func, consumer):
+        self.func = func
+        self.consumer = consumer
+
+    def __call__(self, *args, **kwargs):
+        if len(args) > _STREAM_ARG:
+            args = list(args)
+            args[_STREAM_ARG] = True
+        else:
+            kwargs['stream'] = True
+        return consume(self.func(*args, **kwargs), self.consumer)
+
+
+# backends whose workers have their own copies of everything
+_ISOLATED = (PROCESSES, INTERPRETERS)
+
+
+def _backend(executor):
+    """How `executor` runs requests, one of the requests_futures.executors
+    backends"""
+    if isinstance(executor, ProcessPoolExecutor):
+        return PROCESSES
+    if InterpreterPoolExecutor is not None and isinstance(
+        executor, InterpreterPoolExecutor
+    ):
+        return INTERPRETERS
+    return FREE_THREADED if gil_disabled() else THREADS
+
+
+def _request_args(spec):
+    """Turns a `map` request spec into `request` args and kwargs.
+
+    A spec is a url (GET), a mapping of `request` kwargs where `method`
+    defaults to GET, or a `(method, url[, kwargs])` tuple.
+    """
+    if isinstance(spec, str):
+        return ('GET', spec), {}
+    if isinstance(spec, Mapping):
+        kwargs = dict(spec)
+        method = kwargs.pop('method', 'GET')
+        url = kwargs.pop('url')
+        return (method, url), kwargs
+    method, url, *rest = spec
+    return (method, url), dict(*rest)
+
+
+# methods whose requests can safely share a single response
+_COALESCE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+# request kwargs that make a request's response its own
+_UNCOALESCABLE = ('data', 'files', 'json', 'hooks', 'stream')
+# the cache is keyed by URL, these would have it serve one caller's response
+# to another
+_UNCACHEABLE = _UNCOALESCABLE + ('auth', 'cookies', 'cert', 'proxies')
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _clone_response(resp):
+    """Copies a response so that it can be handed to another caller
+    without them seeing each other's changes. The content is shared, it's
+    immutable, but the mutable bits are not."""
+    if not isinstance(resp, Response):
+        return resp
+    clone = type(resp).__new__(type(resp))
+    # __dict__ rather than __getstate__ to keep attributes added by hooks
+    clone.__dict__.update(resp.__dict__)
+    clone.headers = resp.headers.copy()
+    clone.cookies = resp.cookies.copy()
+    clone.history = list(resp.history)
+    if resp.request is not None:
+        clone.request = resp.request.copy()
+    return clone
+
+
+def _follow(shared):
+    """Returns a Future that resolves to a copy of `shared`'s response"""
+    view = Future()
+
+    def copy(shared):
+        if shared.cancelled():
+            view.cancel()
+            return
+        if not view.set_running_or_notify_cancel():
+            return
+        exception = shared.exception()
+        if exception is None:
+            view.set_result(_clone_response(shared.result()))
+        else:
+            view.set_exception(exception)
+
+    shared.add_done_callback(copy)
+    return view
+
+
 PICKLE_ERROR = (
     'Cannot pickle function. Refer to documentation: https://'
     'github.com/ross/requests-futures/#using-processpoolexecutor'
 )
 
 
+class SaturatedError(RuntimeError):
+    """Raised when a request would take a session past its `max_pending`"""
+
+
+def _chain(source, target):
+    """Copies the outcome of `source` onto `target` once it's done"""
+
+    def copy(source):
+        if source.cancelled():
+            # the executor refused or dropped the work
+            target.set_exception(RuntimeError('request was cancelled'))
+            return
+        exception = source.exception()
+        if exception is None:
+            target.set_result(source.result())
+        else:
+            target.set_exception(exception)
+
+    source.add_done_callback(copy)
+
+
+def _then(source, fn):
+    """Returns a Future for `fn` applied to the result of `source`.
+    Cancelling it cancels `source` if that hasn't started yet."""
+    target = Future()
+
+    def apply(source):
+        if source.cancelled():
+            target.cancel()
+            return
+        if not target.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(source.result())
+        except Exception as e:
+            target.set_exception(e)
+        else:
+            target.set_result(result)
+
+    def cancel(target):
+        if target.cancelled():
+            source.cancel()
+
+    target.add_done_callback(cancel)
+    source.add_done_callback(apply)
+    return target
+
+
+def _pipe(source, fn):
+    """Returns a Future for the outcome of the Future `fn` returns when
+    given the result of `source`. Cancelling it cancels whichever of the two
+    is underway if that hasn't started yet."""
+    target = Future()
+    stage = [source]
+
+    def finish(future):
+        if future.cancelled():
+            target.cancel()
+            return
+        if not target.set_running_or_notify_cancel():
+            return
+        exception = future.exception()
+        if exception is None:
+            target.set_result(future.result())
+        else:
+            target.set_exception(exception)
+
+    def apply(source):
+        if source.cancelled() or source.exception() is not None:
+            finish(source)
+            return
+        try:
+            future = fn(source.result())
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        stage[0] = future
+        if target.cancelled():
+            future.cancel()
+        future.add_done_callback(finish)
+
+    def cancel(target):
+        if target.cancelled():
+            stage[0].cancel()
+
+    target.add_done_callback(cancel)
+    source.add_done_callback(apply)
+    return target
+
+
+def _gathered(futures, fn):
+    """Returns a Future for `fn` applied to the list of results of
+    `futures` once they're all done, failing if any of them did"""
+    target = Future()
+    target.set_running_or_notify_cancel()
+    remaining = [len(futures)]
+    lock = Lock()
+
+    def gather(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        try:
+            target.set_result(fn([f.result() for f in futures]))
+        except BaseException as e:
+            target.set_exception(e)
+
+    if not futures:
+        remaining[0] = 1
+        gather(None)
+    for future in futures:
+        future.add_done_callback(gather)
+    return target
+
+
+def _open(pool, conn):
+    """Connects `conn` if it isn't already and returns it to `pool`,
+    returns 1 if it was opened"""
+    try:
+        if conn.sock is not None:
+            return 0
+        conn.connect()
+        return 1
+    except BaseException:
+        conn.close()
+        raise
+    finally:
+        pool._put_conn(conn)
+
+
+def _rejected(exception):
+    """Returns an already failed Future for `exception`"""
+    future = Future()
+    future.set_exception(exception)
+    return future
+
+
+def _origin(url):
+    parsed = urlparse(url.lower())
+    return '{}://{}'.format(parsed.scheme, parsed.netloc)
+
+
+def _record_outcome(breaker, key, allowed, future):
+    """Tells `breaker` whether a request failed in a way that says the host
+    is unwell"""
+    failed = None
+    if not future.cancelled():
+        exception = future.exception()
+        if exception is None:
+            resp = future.result()
+            failed = isinstance(resp, Response) and resp.status_code >= 500
+        elif isinstance(exception, DeadlineExceeded):
+            # ours rather than the host's, it may not have been sent at all
+            pass
+        elif isinstance(exception, (ConnectionError, Timeout)):
+            failed = True
+    breaker.record(key, allowed, failed)
+
+
+def _discard(resp):
+    """Reads the rest of a response that won't be used and closes it so
+    that its connection goes back to the pool"""
+    drain = getattr(resp.raw, 'drain_conn', None)
+    if drain is not None:
+        drain()
+    resp.close()
+
+
+def _resolved(result):
+    """Returns an already completed Future for `result`"""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _executor_submit(executor, priority, func, *args, **kwargs):
+    if priority and hasattr(executor, 'submit_priority'):
+        return executor.submit_priority(priority, func, *args, **kwargs)
+    return executor.submit(func, *args, **kwargs)
+
+
+def _bucket(rate):
+    """A TokenBucket for `rate`, requests per second, or a copy of it if
+    it's already a bucket so that it can be used for another host"""
+    if rate is None:
+        return None
+    if isinstance(rate, TokenBucket):
+        return TokenBucket(rate.rate, rate.burst)
+    return TokenBucket(rate)
+
+
+def _failed(future):
+    """True if a request raised or got a response saying the server is
+    struggling"""
+    if future.exception() is not None:
+        return True
+    resp = future.result()
+    return isinstance(resp, Response) and (
+        resp.status_code == 429 or resp.status_code >= 500
+    )
+
+
+class _HostScheduler(object):
+    """Queues requests per host and feeds them to an executor fairly.
+
+    At most `max_active` jobs, normally the executor's worker count, are
+    handed to the executor at once so that its FIFO queue never builds up.
+    Hosts with queued work are served round-robin and none is allowed more
+    than its limit of concurrent requests so a slow host can't take every
+    worker. With a `limiter` the overall limit is further capped by its
+    current limit, which is fed the outcome of each request.
+
+    Each host's requests are taken highest priority first, aging as with
+    PriorityThreadPoolExecutor. Hosts take turns unless one's next request
+    is more than a priority point ahead of the others'.
+
+    Rate limits hold requests in the queues until the `rate_limit` bucket,
+    and the host's bucket, have a token for them, with `timer` used to come
+    back when one will. 429s, and 503s with a Retry-After, pause the host.
+    """
+
+    def __init__(
+        self,
+        executor,
+        max_active,
+        max_per_host,
+        host_limits,
+        limiter=None,
+        rate_limit=None,
+        rate_limit_per_host=None,
+        host_rate_limits=None,
+        timer=None,
+    ):
+        self.executor = executor
+        self.max_active = max_active
+        self.limiter = limiter
+        self.max_per_host = max_per_host
+        self.host_limits = {
+            k.lower(): v for k, v in (host_limits or {}).items()
+        }
+        self.rate_limit = _bucket(rate_limit)
+        self.rate_limit_per_host = rate_limit_per_host
+        self._buckets = {
+            k.lower(): _bucket(v) for k, v in (host_rate_limits or {}).items()
+        }
+        # longest prefix first, the same way Session.get_adapter matches
+        self._prefixes = sorted(
+            set(self.host_limits) | set(self._buckets), key=len, reverse=True
+        )
+        self._paused = {}
+        self._timer = timer
+        self._wakeup = None
+        self.aging = getattr(executor, 'aging', DEFAULT_AGING)
+        self.active = Counter()
+        self._queues = OrderedDict()
+        self._seq = count()
+        self._total_active = 0
+        self._cond = Condition()
+
+    def key(self, url):
+        lowered = url.lower()
+        for prefix in self._prefixes:
+            if lowered.startswith(prefix):
+                return prefix
+        parsed = urlparse(lowered)
+        return '{}://{}'.format(parsed.scheme, parsed.netloc)
+
+    def limit(self, key):
+        return self.host_limits.get(key, self.max_per_host)
+
+    def bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None and self.rate_limit_per_host:
+            bucket = self._buckets[key] = _bucket(self.rate_limit_per_host)
+        return bucket
+
+    def _host_wait(self, key, now):
+        wait = 0
+        paused = self._paused.get(key)
+        if paused is not None:
+            if paused > now:
+                wait = paused - now
+            else:
+                del self._paused[key]
+        bucket = self.bucket(key)
+        if bucket is not None:
+            wait = max(wait, bucket.wait(now))
+        return wait
+
+    def submit(self, url, priority, deadline, func, *args, **kwargs):
+        future = Future()
+        key = self.key(url)
+        with self._cond:
+            heappush(
+                self._queues.setdefault(key, []),
+                (
+                    priority_key(priority, self.aging),
+                    next(self._seq),
+                    (future, deadline, priority, func, args, kwargs),
+                ),
+            )
+        self._dispatch()
+        return future
+
+    def _take(self, now, expired):
+        """Returns the key and job to run next, or if there's nothing that
+        can be yet, None, None and the number of seconds until there might
+        be. Jobs whose deadline has passed are added to `expired`."""
+        if self.rate_limit is not None:
+            wait = self.rate_limit.wait(now)
+            if wait:
+                return None, None, wait
+        wait = None
+        best = None
+        # queues are kept least recently served first
+        for key, queue in list(self._queues.items()):
+            # cancelled and expired jobs shouldn't use up tokens
+            while queue:
+                future, deadline = queue[0][2][:2]
+                if future.cancelled():
+                    heappop(queue)
+                elif deadline is not None and not deadline.remaining(now):
+                    expired.append(heappop(queue)[2][0])
+                else:
+                    break
+            if not queue:
+                del self._queues[key]
+                continue
+            limit = self.limit(key)
+            if limit is not None and self.active[key] >= limit:
+                continue
+            host_wait = self._host_wait(key, now)
+            if host_wait:
+                wait = host_wait if wait is None else min(wait, host_wait)
+            elif best is None or queue[0][0] < best[1][0][0] - 1:
+                best = (key, queue)
+        if best is None:
+            return None, None, wait
+        key, queue = best
+        job = heappop(queue)[2]
+        if queue:
+            self._queues.move_to_end(key)
+        else:
+            del self._queues[key]
+        if self.rate_limit is not None:
+            self.rate_limit.consume(now)
+        bucket = self.bucket(key)
+        if bucket is not None:
+            bucket.consume(now)
+        return key, job, None
+
+    @property
+    def cap(self):
+        if self.limiter is None:
+            return self.max_active
+        return min(self.max_active, self.limiter.limit)
+
+    def _dispatch(self):
+        jobs = []
+        expired = []
+        with self._cond:
+            cap = self.cap
+            now = monotonic()
+            while self._total_active < cap:
+                key, job, wait = self._take(now, expired)
+                if job is None:
+                    if wait:
+                        self._wake_in(wait, now)
+                    break
+                if not job[0].set_running_or_notify_cancel():
+                    # cancelled while it was queued
+                    continue
+                self.active[key] += 1
+                self._total_active += 1
+                jobs.append((key, job))
+            if not self._queues:
+                # cancelled and expired jobs may have just been dropped,
+                # join could be waiting on them
+                self._cond.notify_all()
+
+        for future in expired:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(_deadline_exceeded())
+        for key, (future, _, priority, func, args, kwargs) in jobs:
+            try:
+                inner = _executor_submit(
+                    self.executor, priority, func, *args, **kwargs
+                )
+            except BaseException as e:
+                future.set_exception(e)
+                self._done(key)
+                continue
+            _chain(inner, future)
+            inner.add_done_callback(partial(self._done, key, monotonic()))
+
+    def _wake_in(self, wait, now):
+        when = now + wait
+        if self._wakeup is not None and self._wakeup <= when:
+            # already coming back by then
+            return
+        self._wakeup = when
+        self._timer.call_later(wait, self._woken)
+
+    def _woken(self):
+        with self._cond:
+            self._wakeup = None
+        self._dispatch()
+
+    def _throttled(self, key, resp):
+        """Pauses `key` when `resp` says we're making too many requests"""
+        if not isinstance(resp, Response):
+            return
+        if resp.status_code not in (429, 503):
+            return
+        try:
+            seconds = Retry().parse_retry_after(resp.headers['Retry-After'])
+        except (KeyError, InvalidHeader):
+            seconds = None
+        bucket = self.bucket(key)
+        if seconds is None:
+            if resp.status_code == 503:
+                # just unavailable, nothing to do with us
+                return
+            # back off for as long as a token takes to come around
+            slowest = bucket or self.rate_limit
+            if slowest is None:
+                return
+            seconds = 1.0 / slowest.rate
+        now = monotonic()
+        if bucket is not None:
+            bucket.pause(seconds, now)
+        else:
+            with self._cond:
+                self._paused[key] = max(self._paused.get(key, 0), now + seconds)
+
+    def _done(self, key, dispatched=None, inner=None):
+        if inner is not None and not inner.cancelled():
+            if self.limiter is not None:
+                self.limiter.record(
+                    monotonic() - dispatched, self._total_active, _failed(inner)
+                )
+            if inner.exception() is None:
+                self._throttled(key, inner.result())
+        with self._cond:
+            self.active[key] -= 1
+            if not self.active[key]:
+                del self.active[key]
+            self._total_active -= 1
+            self._cond.notify_all()
+        self._dispatch()
+
+    @property
+    def queued(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def cancel(self):
+        """Cancels all of the queued requests"""
+        with self._cond:
+            futures = [
+                entry[2][0]
+                for queue in self._queues.values()
+                for entry in queue
+            ]
+            self._queues.clear()
+            self._cond.notify_all()
+        for future in futures:
+            future.cancel()
+
+    def join(self):
+        """Waits for all queued and active requests to finish"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._queues and not self._total_active
+            )
+
+
+class _Timer(object):
+    """Runs callables after a delay on a single background thread so that
+    waiting, e.g. for a retry's backoff, doesn't hold a worker"""
+
+    def __init__(self):
+        self._calls = []
+        self._seq = count()
+        self._cond = Condition()
+        self._thread = None
+
+    def call_later(self, delay, fn, *args):
+        with self._cond:
+            heappush(
+                self._calls, (monotonic() + delay, next(self._seq), fn, args)
+            )
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name='FuturesSessionTimer', daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._thread is not current_thread():
+                        # stopped
+                        return
+                    timeout = None
+                    if self._calls:
+                        timeout = self._calls[0][0] - monotonic()
+                        if timeout <= 0:
+                            _, _, fn, args = heappop(self._calls)
+                            break
+                    self._cond.wait(timeout)
+            try:
+                fn(*args)
+            except Exception:
+                getLogger(self.__class__.__name__).exception(
+                    'delayed call failed'
+                )
+
+    def stop(self):
+        """Stops the thread, dropping any calls that haven't run yet"""
+        with self._cond:
+            self._calls = []
+            self._thread = None
+            self._cond.notify()
+
+
+def _urllib3_error(error):
+    """Digs the urllib3 exception that `Retry` understands out of the
+    requests exception wrapping it"""
+    cause = error.args[0] if error.args else None
+    if isinstance(cause, MaxRetryError):
+        cause = cause.reason
+    return cause if isinstance(cause, Exception) else error
+
+
+class _Attempts(object):
+    """Drives a request through retries and hedging, reporting the final
+    outcome on `future`.
+
+    Retries are scheduled on the session's timer so no worker sleeps through
+    a backoff. A hedge is a duplicate of an idempotent request sent if the
+    first hasn't answered in time, whichever answers first wins and the
+    other is cancelled if it's still queued.
+    """
+
+    def __init__(self, session, func, args, kwargs):
+        self.session = session
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.method = str(args[0] if args else kwargs.get('method')).upper()
+        self.url = args[1] if len(args) > 1 else kwargs.get('url')
+        self.retry = session.retries
+        self.future = Future()
+        self.future.add_done_callback(self._cancelled)
+        self.running = set()
+        self.hedged = False
+        self.resolved = False
+        self.lock = Lock()
+
+    def start(self):
+        deadline = self.kwargs.get('deadline')
+        if deadline is not None and not deadline.remaining():
+            return _rejected(_deadline_exceeded())
+        # one pending slot however many attempts it takes, the timer that
+        # sends retries and hedges mustn't wait for one, let SaturatedError
+        # go to the caller
+        self.session._hold_pending(deadline)
+        self.future.add_done_callback(self.session._release_pending)
+        try:
+            self._send()
+        except BaseException:
+            self.future.cancel()
+            raise
+        if self.method in Retry.DEFAULT_ALLOWED_METHODS:
+            delay = self.session._hedge_delay()
+            if delay is not None:
+                self.session._timer.call_later(delay, self._hedge)
+        return self.future
+
+    def _send(self):
+        attempt = self.session._dispatch(self.func, *self.args, **self.kwargs)
+        with self.lock:
+            self.running.add(attempt)
+        attempt.add_done_callback(partial(self._attempt_done, monotonic()))
+
+    def _attempt(self):
+        if self.resolved:
+            return
+        try:
+            self._send()
+        except Exception as e:
+            self._resolve(exception=e)
+
+    def _hedge(self):
+        with self.lock:
+            if self.resolved or self.hedged or not self.running:
+                return
+            self.hedged = True
+        try:
+            self._send()
+        except Exception:
+            # no hedge then, the first attempt is still going
+            pass
+
+    def _attempt_done(self, started, attempt):
+        with self.lock:
+            self.running.discard(attempt)
+            others = bool(self.running)
+        if self.resolved:
+            return
+        if attempt.cancelled():
+            if not others:
+                # e.g. the executor was shut down, nothing's left to answer
+                self.future.cancel()
+            return
+        error = attempt.exception()
+        if error is None:
+            self.session._latencies.append(monotonic() - started)
+            self._handle_response(attempt.result(), others)
+        else:
+            self._handle_error(error, others)
+
+    def _handle_error(self, error, others):
+        retry = self.retry
+        if (
+            retry is None
+            or not isinstance(error, (ConnectionError, Timeout))
+            or isinstance(error, DeadlineExceeded)
+        ):
+            if not others:
+                self._resolve(exception=error)
+            return
+        try:
+            self.retry = retry.increment(
+                self.method, self.url, error=_urllib3_error(error)
+            )
+        except Exception:
+            # exhausted, or not retryable
+            if not others:
+                self._resolve(exception=error)
+            return
+        if not others:
+            self._later(self.retry.get_backoff_time())
+
+    def _handle_response(self, resp, others):
+        retry = self.retry
+        raw = getattr(resp, 'raw', None)
+        if (
+            retry is None
+            or raw is None
+            or not isinstance(resp, Response)
+            or not retry.is_retry(
+                self.method, resp.status_code, 'Retry-After' in resp.headers
+            )
+        ):
+            self._resolve(result=resp)
+            return
+        try:
+            self.retry = retry.increment(self.method, self.url, response=raw)
+        except MaxRetryError as e:
+            if retry.raise_on_status:
+                _discard(resp)
+                self._resolve(exception=RetryError(e, request=resp.request))
+            else:
+                self._resolve(result=resp)
+            return
+        # get the retry's delay before letting go of what it's based on
+        delay = None
+        if self.retry.respect_retry_after_header:
+            delay = self.retry.get_retry_after(raw)
+        if delay is None:
+            delay = self.retry.get_backoff_time()
+        # streamed ones are still holding a pooled connection
+        _discard(resp)
+        if others:
+            # let the hedge answer
+            return
+        self._later(delay)
+
+    def _later(self, delay):
+        """Schedules the next attempt, no later than the deadline where
+        it'll fail straight away rather than keep the caller waiting"""
+        deadline = self.kwargs.get('deadline')
+        if deadline is not None:
+            delay = min(delay, deadline.remaining())
+        self.session._timer.call_later(delay, self._attempt)
+
+    def _resolve(self, result=None, exception=None):
+        with self.lock:
+            if self.resolved:
+                return
+            self.resolved = True
+            losers = list(self.running)
+        for attempt in losers:
+            attempt.cancel()
+        if not self.future.set_running_or_notify_cancel():
+            return
+        if exception is None:
+            self.future.set_result(result)
+        else:
+            self.future.set_exception(exception)
+
+    def _cancelled(self, future):
+        if future.cancelled():
+            with self.lock:
+                self.resolved = True
+                attempts = list(self.running)
+            for attempt in attempts:
+                attempt.cancel()
+
+
 class FuturesSession(Session):
     def __init__(
         self,
@@ -49,6 +1188,28 @@ class FuturesSession(Session):
         session=None,
         adapter_kwargs=None,
         *args,
+        max_pending=None,
+        pending_timeout=None,
+        max_per_host=None,
+        host_limits=None,
+        use_processes=False,
+        coalesce=False,
+        cache=None,
+        retries=None,
+        hedge_after=None,
+        hedge_percentile=None,
+        metrics_hooks=None,
+        limiter=None,
+        priorities=False,
+        rate_limit=None,
+        rate_limit_per_host=None,
+        host_rate_limits=None,
+        process_executor=None,
+        dns_cache=None,
+        circuit_breaker=None,
+        thread_local_sessions=False,
+        shared=None,
+        parallel=False,
         **kwargs
     ):
         """Creates a FuturesSession
@@ -60,12 +1221,108 @@ class FuturesSession(Session):
 
         * If you provide both `executor` and `max_workers`, the latter is
           ignored and provided executor is used as is.
+
+        * `use_processes` creates a `ProcessPoolExecutor` whose workers each
+          build one long-lived copy of `session`, or this session, when they
+          start. Only the request arguments are sent to them after that so
+          pickling is cheap and connections are kept alive across requests.
+          Changes made to the session after the first request aren't seen by
+          the workers.
+
+        * `max_pending` caps the number of queued plus running requests.
+          Once reached `request` blocks for up to `pending_timeout` seconds,
+          forever if it's None, for a slot to free up and raises
+          `SaturatedError` if none does. A `pending_timeout` of 0 sheds load
+          immediately. A request keeps its slot through its retries and
+          hedges.
+
+        * `max_per_host` caps concurrent requests to any one host and
+          `host_limits` maps mount prefixes, e.g. `https://slow.example.com`,
+          to their own caps. When either is given requests are queued per
+          host and dispatched round-robin so a slow host can't starve the
+          others, and connection pools are sized to match the caps.
+
+        * `rate_limit` caps requests per second across the session,
+          `rate_limit_per_host` does the same for each host, and
+          `host_rate_limits` maps mount prefixes to their own rates. Each may
+          be a number or a `requests_futures.limits.TokenBucket` to allow
+          bursts. Requests wait in the host queues, not in workers, until
+          they're allowed and hosts answering 429 are paused for their
+          Retry-After.
+
+        * `process_executor` runs the `process` functions passed to
+          `request`, by default a `ProcessPoolExecutor` is created the first
+          time one is needed. Requests still run on `executor`.
+
+        * `dns_cache`, True or a `requests_futures.adapters.DNSCache`, is
+          shared by the default adapters' connections so that hosts are
+          looked up once per TTL rather than once per connection.
+
+        * `circuit_breaker`, True or a `requests_futures.limits.CircuitBreaker`,
+          fails requests to hosts that keep failing immediately, with
+          `CircuitOpenError`, rather than tying up a worker until they time
+          out.
+
+        * `thread_local_sessions` gives each worker thread its own session,
+          with its own adapters, connection pools, and cookie jar, so that
+          they don't contend with each other. Other settings are read from
+          `session`, or this session, as requests are made. Mounting an
+          adapter, or calling `refresh_sessions`, has the threads make new
+          copies before their next request.
+
+        * `shared` names an executor and pair of default adapters in the
+          process-wide `requests_futures.shared.registry` to use rather than
+          creating new ones. The first session to use a name creates them,
+          from its `max_workers`, `priorities`, `adapter_kwargs`, and
+          `dns_cache`, and they're shut down when the last session using
+          them is closed. Everything else, e.g. headers and cookies, is still
+          the session's own.
+
+        * `parallel` picks the cheapest way this interpreter has of running
+          requests, and their hooks, in parallel. Threads on a free-threaded
+          build without the GIL, otherwise an `InterpreterPoolExecutor` on
+          Python 3.14+, which works like `use_processes` with a copy of
+          the session per interpreter, and plain threads failing that.
+          `priorities`, `thread_local_sessions`, and `shared` need threads so
+          rule out interpreters. `backend` says which was picked.
         """
         _adapter_kwargs = {}
         super(FuturesSession, self).__init__(*args, **kwargs)
         self._owned_executor = executor is None
-        if executor is None:
-            executor = ThreadPoolExecutor(max_workers=max_workers)
+        if limiter is not None:
+            max_workers = max(max_workers, limiter.max_limit)
+        self._use_processes = use_processes and executor is None
+        if thread_local_sessions and (
+            self._use_processes or _backend(executor) in _ISOLATED
+        ):
+            raise ValueError('thread_local_sessions requires threads')
+        if priorities and self._use_processes:
+            raise ValueError('priorities are only supported with threads')
+        if shared is not None and (executor is not None or use_processes):
+            raise ValueError('shared sessions use the shared executor')
+        if parallel and (executor is not None or use_processes):
+            raise ValueError('parallel sessions pick their own executor')
+        self._use_interpreters = False
+        if parallel:
+            threads_only = (
+                priorities or thread_local_sessions or shared is not None
+            )
+            self._use_interpreters = (
+                parallel_backend(not threads_only) == INTERPRETERS
+            )
+        if self._use_processes:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker_session,
+                initargs=(session or self,),
+            )
+        elif executor is None and not self._use_interpreters:
+            if priorities:
+                executor_cls = PriorityThreadPoolExecutor
+            else:
+                executor_cls = ThreadPoolExecutor
+            if shared is None:
+                executor = executor_cls(max_workers=max_workers)
             # set connection pool size equal to max_workers if needed
             if max_workers > DEFAULT_POOLSIZE:
                 _adapter_kwargs.update(
@@ -75,14 +1332,130 @@ class FuturesSession(Session):
                     }
                 )
 
+        if max_per_host:
+            _adapter_kwargs['pool_maxsize'] = max_per_host
+        if dns_cache is True:
+            dns_cache = DNSCache()
+        if dns_cache is not None and dns_cache is not False:
+            _adapter_kwargs['dns_cache'] = dns_cache
         _adapter_kwargs.update(adapter_kwargs or {})
 
-        if _adapter_kwargs:
-            self.mount('https://', HTTPAdapter(**_adapter_kwargs))
-            self.mount('http://', HTTPAdapter(**_adapter_kwargs))
+        self.shared = shared
+        self._shared_resources = None
+        if shared is not None:
+            resources = self._shared_resources = registry.acquire(
+                shared,
+                lambda: SharedResources(
+                    executor_cls(max_workers=max_workers), _adapter_kwargs
+                ),
+            )
+            executor = resources.executor
+            self._owned_executor = False
+            for prefix, adapter in resources.adapters.items():
+                self.mount(prefix, adapter)
+        else:
+            self.mount('https://', FuturesHTTPAdapter(**_adapter_kwargs))
+            self.mount('http://', FuturesHTTPAdapter(**_adapter_kwargs))
+        for prefix, limit in (host_limits or {}).items():
+            prefix_kwargs = dict(_adapter_kwargs, pool_maxsize=limit)
+            prefix_kwargs.update(adapter_kwargs or {})
+            self.mount(prefix, FuturesHTTPAdapter(**prefix_kwargs))
 
+        if self._use_interpreters:
+            # created now so that the workers' copies have the adapters
+            executor = InterpreterPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker_session,
+                initargs=(session or self,),
+            )
         self.executor = executor
+        self.backend = _backend(executor)
         self.session = session
+        # whether requests can be pickled, with and without each callback,
+        # weakly so that per-request callbacks don't pile up
+        self._picklable = WeakKeyDictionary()
+        self._picklable_without = None
+
+        self.thread_local_sessions = thread_local_sessions
+        self._local = local()
+        self._generation = 0
+        self._thread_sessions = WeakSet()
+        # requests_futures.batching.BatchSenders to drain on close
+        self._batchers = WeakSet()
+
+        self._process_executor = process_executor
+        self._owned_process_executor = process_executor is None
+        self._process_executor_lock = Lock()
+
+        self.cache = cache
+        self.coalesce = coalesce
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breaker = circuit_breaker or None
+
+        self.retries = None if retries is None else Retry.from_int(retries)
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self._latencies = deque(maxlen=1000)
+        self._attempts = set()
+        self._timer = _Timer()
+        self._in_flight = {}
+        self._in_flight_lock = Lock()
+
+        self.metrics_hooks = list(metrics_hooks or [])
+        # workers can only be counted when they're threads in this process
+        self._active = None if self.backend in _ISOLATED else _Gauge()
+
+        self._pending = 0
+        self._pending_lock = Lock()
+        # so that close can cancel them whoever's executor they're on
+        self._submitted = set()
+        self._pending_slots = (
+            BoundedSemaphore(max_pending) if max_pending else None
+        )
+        self.pending_timeout = pending_timeout
+
+        self._scheduler = None
+        if (
+            max_per_host
+            or host_limits
+            or limiter is not None
+            or rate_limit
+            or rate_limit_per_host
+            or host_rate_limits
+        ):
+            self._scheduler = _HostScheduler(
+                executor,
+                getattr(executor, '_max_workers', max_workers),
+                max_per_host,
+                host_limits,
+                limiter,
+                rate_limit,
+                rate_limit_per_host,
+                host_rate_limits,
+                self._timer,
+            )
+
+        self.limiter = limiter
+        self._max_per_host = max_per_host
+        if limiter is not None:
+            limiter.listeners.append(self._resize_pools)
+            self._resize_pools(limiter.limit)
+
+    def _resize_pools(self, limit):
+        """Keeps the default adapters' pools in step with the limiter"""
+        if self._max_per_host:
+            limit = min(limit, self._max_per_host)
+        for session in self._sessions():
+            for prefix in ('http://', 'https://'):
+                adapter = session.adapters.get(prefix)
+                if hasattr(adapter, 'resize'):
+                    adapter.resize(limit)
+
+    @property
+    def pending(self):
+        """The number of requests currently queued or running"""
+        return self._pending
 
     def request(self, *args, **kwargs):
         """Maintains the existing api for Session.request.
@@ -93,13 +1466,48 @@ class FuturesSession(Session):
         response in the background, e.g. call resp.json() so that json parsing
         happens in the background thread.
 
+        The priority param, higher is sooner, orders queued requests when the
+        executor is a PriorityThreadPoolExecutor, e.g. with `priorities=True`,
+        or there are host limits. It's ignored otherwise.
+
+        The process param takes a function, which must be picklable, that's
+        run on the session's process executor with the response's body bytes
+        once it arrives. The returned Future resolves to what it returns
+        rather than the response.
+
+        The deadline param, seconds from now or a
+        `requests_futures.limits.Deadline`, is when the request, including
+        any retries, must be done by. If it passes before the request is
+        sent it fails with `DeadlineExceeded` without touching the network,
+        otherwise its connect and read timeouts are cut to what's left.
+
+        The consumer param takes a `requests_futures.consumers.Consumer`
+        that's fed the response's body on the worker as it arrives, the
+        returned Future resolves to its result rather than the response.
+        Consumers are for a single request and, as they may have seen part of
+        a body by the time there's anything to retry, those requests aren't
+        retried or hedged.
+
         :rtype : concurrent.futures.Future
         """
-        if self.session:
-            func = self.session.request
-        else:
-            # avoid calling super to not break pickled method
-            func = partial(Session.request, self)
+        if kwargs.get('deadline') is not None:
+            # fixed now so that retries and the like share it
+            kwargs['deadline'] = _as_deadline(kwargs['deadline'])
+        consumer = kwargs.pop('consumer', None)
+        process = kwargs.pop('process', None)
+        if consumer is not None:
+            if process is not None:
+                raise ValueError('consumer and process can\'t be combined')
+            if self.backend in _ISOLATED:
+                raise ValueError(
+                    'consumer requires threads, it can\'t be used with '
+                    'processes or interpreters'
+                )
+        if process is not None:
+            return _pipe(
+                self.request(*args, **kwargs),
+                partial(self._post_process, process),
+            )
 
         background_callback = kwargs.pop('background_callback', None)
         if background_callback:
@@ -108,21 +1516,630 @@ class FuturesSession(Session):
                 '`background_callback` is deprecated and will be '
                 'removed in 1.0, use `hooks` instead'
             )
-            func = partial(wrap, self, func, background_callback)
 
-        if isinstance(self.executor, ProcessPoolExecutor):
-            # verify function can be pickled
+        if self._use_processes or self._use_interpreters:
+            func = partial(_worker_request, background_callback)
+        else:
+            if self.thread_local_sessions:
+                func = self._thread_request
+            elif self.session:
+                func = self.session.request
+            else:
+                # avoid calling super to not break pickled method
+                func = partial(Session.request, self)
+            if background_callback:
+                func = partial(wrap, self, func, background_callback)
+            if consumer is not None:
+                func = _Consuming(func, consumer)
+
+        if self.backend in _ISOLATED:
+            self._check_picklable(func, background_callback)
+
+        # neither callbacks nor consumers can be run on cached or shared
+        # responses
+        unconsumed = not background_callback and consumer is None
+        if self.cache is not None and unconsumed:
+            future = self._cached_request(func, args, kwargs)
+            if future is not None:
+                return future
+
+        key = None
+        if self.coalesce and unconsumed:
+            key = self._coalesce_key(args, kwargs)
+        if key is None:
+            return self._send(func, *args, **kwargs)
+
+        with self._in_flight_lock:
+            shared = self._in_flight.get(key)
+            if shared is not None:
+                return _follow(shared)
+            shared = self._in_flight[key] = Future()
+        shared.set_running_or_notify_cancel()
+        shared.add_done_callback(partial(self._landed, key))
+        try:
+            _chain(self._send(func, *args, **kwargs), shared)
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        return _follow(shared)
+
+    def _check_picklable(self, func, background_callback):
+        """Raises RuntimeError if `func` can't be pickled"""
+        if not (self._use_processes or self._use_interpreters):
+            # it takes the session, whose hooks and adapters can change, along
+            # with it so it's checked every time
+            picklable = _picklable(func)
+        elif background_callback is None:
+            if self._picklable_without is None:
+                self._picklable_without = _picklable(func)
+            picklable = self._picklable_without
+        else:
+            # only the callback goes to the workers, check once per callback
+            # where it can be remembered
             try:
-                dumps(func)
-            except (TypeError, PickleError):
-                raise RuntimeError(PICKLE_ERROR)
+                picklable = self._picklable.get(background_callback)
+                if picklable is None:
+                    picklable = self._picklable[background_callback] = (
+                        _picklable(func)
+                    )
+            except TypeError:
+                # can't be weakly referenced or hashed
+                picklable = _picklable(func)
+        if not picklable:
+            raise RuntimeError(PICKLE_ERROR)
 
-        return self.executor.submit(func, *args, **kwargs)
+    def mount(self, prefix, adapter):
+        super(FuturesSession, self).mount(prefix, adapter)
+        # __init__ mounts before there's anything to refresh
+        if hasattr(self, '_generation'):
+            self.refresh_sessions()
 
-    def close(self):
+    def refresh_sessions(self):
+        """Has `thread_local_sessions` threads copy the template session
+        again before their next request, e.g. after cookies have been added
+        to it"""
+        self._generation += 1
+
+    def _thread_session(self):
+        """Returns the current thread's session, making it if need be"""
+        state = self._local
+        current = getattr(state, 'session', None)
+        if current is None or state.generation != self._generation:
+            if current is not None:
+                current.close()
+            state.generation = self._generation
+            current = state.session = _ThreadSession(self.session or self)
+            self._thread_sessions.add(current)
+        return current
+
+    def _thread_request(self, *args, **kwargs):
+        return self._thread_session().request(*args, **kwargs)
+
+    def _sessions(self):
+        """This session and the thread sessions cloned from it"""
+        return [self] + list(self._thread_sessions)
+
+    @property
+    def process_executor(self):
+        """The executor `process` functions run on, a ProcessPoolExecutor
+        with a worker per CPU is created on first use if one wasn't passed
+        in"""
+        with self._process_executor_lock:
+            if self._process_executor is None:
+                self._process_executor = ProcessPoolExecutor()
+            return self._process_executor
+
+    def _post_process(self, process, resp):
+        # only the body crosses over, the response may well not pickle
+        return self.process_executor.submit(process, resp.content)
+
+    def _cached_request(self, func, args, kwargs):
+        """Answers a GET from the cache when possible, otherwise submits it
+        such that the response will be cached. Returns None for requests that
+        can't be cached."""
+        if len(args) > 2 or self.stream:
+            return None
+        if any(kwargs.get(k) for k in _UNCACHEABLE):
+            return None
+        method = args[0] if args else kwargs.get('method')
+        if str(method).upper() != 'GET':
+            return None
+
+        # identify the request the same way Session.prepare_request will
+        url = args[1] if len(args) > 1 else kwargs.get('url')
+        headers = merge_setting(
+            kwargs.get('headers'), self.headers, dict_class=CaseInsensitiveDict
+        )
+        prepared = PreparedRequest()
+        prepared.prepare_method('GET')
+        prepared.prepare_url(
+            url, merge_setting(kwargs.get('params'), self.params)
+        )
+        prepared.prepare_headers(headers)
+        key = prepared.url
+
+        cache = self.cache
+        entry = cache.get(key)
+        if entry is not None and not entry.matches(headers):
+            entry = None
+        if entry is None:
+            cache.stats.misses += 1
+            future = self._send(func, *args, **kwargs)
+            return _then(future, partial(self._store, key, None, headers))
+
+        now = time()
+        if entry.fresh(now):
+            cache.stats.hits += 1
+            return _resolved(entry.response(prepared))
+
+        kwargs = dict(kwargs)
+        kwargs['headers'] = dict(kwargs.get('headers') or {})
+        kwargs['headers'].update(entry.validators)
+        if entry.usable_stale(now):
+            # serve it as is and revalidate in the background
+            cache.stats.stale += 1
+            future = self._send(func, *args, **kwargs)
+            future.add_done_callback(
+                partial(self._background_store, key, entry, headers)
+            )
+            return _resolved(entry.response(prepared))
+        future = self._send(func, *args, **kwargs)
+        return _then(future, partial(self._store, key, entry, headers))
+
+    def _store(self, key, entry, request_headers, resp):
+        cache = self.cache
+        if entry is not None and resp.status_code == 304:
+            cache.stats.revalidated += 1
+            entry.update(resp.headers)
+            cache.set(key, entry)
+            return entry.response(resp.request)
+        entry = CacheEntry.from_response(resp, request_headers)
+        if entry is not None:
+            cache.set(key, entry)
+        return resp
+
+    def _background_store(self, key, entry, request_headers, future):
+        if not future.cancelled() and future.exception() is None:
+            self._store(key, entry, request_headers, future.result())
+
+    def _coalesce_key(self, args, kwargs):
+        """Identifies requests that can share a response, None for those that
+        can't"""
+        if len(args) > 2 or self.stream:
+            return None
+        if any(kwargs.get(k) for k in _UNCOALESCABLE):
+            return None
+        method = args[0] if args else kwargs.get('method')
+        url = args[1] if len(args) > 1 else kwargs.get('url')
+        if str(method).upper() not in _COALESCE_METHODS:
+            return None
+        others = {
+            k: v
+            for k, v in kwargs.items()
+            if k not in ('method', 'url', 'priority')
+        }
+        try:
+            key = (str(method).upper(), url, _freeze(others))
+            hash(key)
+        except TypeError:
+            # unorderable or unhashable values, don't try to be clever
+            return None
+        return key
+
+    def _landed(self, key, shared):
+        with self._in_flight_lock:
+            if self._in_flight.get(key) is shared:
+                del self._in_flight[key]
+
+    def _send(self, func, *args, **kwargs):
+        """Submits `func` unless the host's circuit is open, retrying and
+        hedging it if configured to"""
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._attempt(func, *args, **kwargs)
+        key = _origin(args[1] if len(args) > 1 else kwargs['url'])
+        allowed = breaker.allow(key)
+        if not allowed:
+            return _rejected(
+                CircuitOpenError('circuit open for {}'.format(key))
+            )
+        try:
+            future = self._attempt(func, *args, **kwargs)
+        except BaseException:
+            breaker.record(key, allowed, None)
+            raise
+        future.add_done_callback(
+            partial(_record_outcome, breaker, key, allowed)
+        )
+        return future
+
+    def _attempt(self, func, *args, **kwargs):
+        if (
+            self.retries is None
+            and self.hedge_after is None
+            and self.hedge_percentile is None
+        ) or isinstance(func, _Consuming):
+            return self._submit(func, *args, **kwargs)
+        future = _Attempts(self, func, args, kwargs).start()
+        self._attempts.add(future)
+        future.add_done_callback(self._attempts.discard)
+        return future
+
+    def _hedge_delay(self):
+        """How long to wait before hedging, None to not hedge"""
+        if self.hedge_percentile is None:
+            return self.hedge_after
+        latencies = sorted(self._latencies)
+        if len(latencies) < 20:
+            # not enough to go on yet
+            return self.hedge_after
+        i = min(
+            int(len(latencies) * self.hedge_percentile / 100.0),
+            len(latencies) - 1,
+        )
+        return max(latencies[i], self.hedge_after or 0)
+
+    def _submit(self, func, *args, **kwargs):
+        """Hands `func` to the executor, or the host scheduler if there is
+        one, keeping track of pending requests along the way"""
+        deadline = kwargs.get('deadline')
+        if deadline is not None and not deadline.remaining():
+            return _rejected(_deadline_exceeded())
+        self._hold_pending(deadline)
+        try:
+            future = self._dispatch(func, *args, **kwargs)
+        except BaseException:
+            self._release_pending()
+            raise
+        future.add_done_callback(self._release_pending)
+        return future
+
+    def _hold_pending(self, deadline=None):
+        """Counts a pending request, waiting for a slot for it if there's a
+        `max_pending`"""
+        slots = self._pending_slots
+        if slots is not None:
+            timeout = self.pending_timeout
+            if deadline is not None:
+                # no point waiting for a slot past the deadline
+                remaining = deadline.remaining()
+                timeout = (
+                    remaining if timeout is None else min(timeout, remaining)
+                )
+            if not slots.acquire(timeout=timeout):
+                raise SaturatedError(
+                    '{} requests pending, waited {}s for a slot'.format(
+                        self._pending, timeout
+                    )
+                )
+        with self._pending_lock:
+            self._pending += 1
+
+    def _dispatch(self, func, *args, **kwargs):
+        """Hands `func` to the executor, or the host scheduler, for a request
+        that's already been counted by `_hold_pending`"""
+        deadline = kwargs.pop('deadline', None)
+        if deadline is not None:
+            if not deadline.remaining():
+                return _rejected(_deadline_exceeded())
+            func = partial(_deadlined, func, deadline)
+        priority = kwargs.pop('priority', None) or 0
+        submitted = time()
+        func = partial(_timed, func, submitted, self._active)
+        if self._scheduler is None:
+            future = _executor_submit(
+                self.executor, priority, func, *args, **kwargs
+            )
+        else:
+            url = args[1] if len(args) > 1 else kwargs['url']
+            future = self._scheduler.submit(
+                url, priority, deadline, func, *args, **kwargs
+            )
+        self._submitted.add(future)
+        future.add_done_callback(self._submitted.discard)
+        if self.metrics_hooks:
+            future.add_done_callback(
+                partial(self._report, submitted, _method_url(args, kwargs))
+            )
+        return future
+
+    def _report(self, submitted, method_url, future):
+        if future.cancelled():
+            return
+        exception = future.exception()
+        result = None if exception else future.result()
+        request_timings = getattr(result, 'timings', None)
+        if request_timings is None:
+            request_timings = RequestTimings(
+                *method_url, submitted, finished=time()
+            )
+            request_timings.exception = exception
+        for hook in self.metrics_hooks:
+            try:
+                hook(request_timings)
+            except Exception:
+                getLogger(self.__class__.__name__).exception(
+                    'metrics hook failed'
+                )
+
+    def metrics(self):
+        """Returns a snapshot of the session's gauges.
+
+        * `pending` requests queued or running
+        * `active` requests being worked on by threads, None for processes
+        * `queued` requests waiting in the executor's queue, or with host
+          limits in the host queues
+        * `max_workers` of the executor
+        * `limit` the limiter's current limit, None without one
+        * `circuits` the state of each host whose circuit isn't closed
+        * `pools` stats for each connection pool of the session's
+          `FuturesHTTPAdapter`s keyed by `scheme://host:port`, `in_use` and
+          `idle` connections, `maxsize`, and counts of requests that found no
+          idle connection (`waits`) and connections closed because the pool
+          was full (`discarded`)
+        """
+        queued = None
+        work_queue = getattr(self.executor, '_work_queue', None)
+        if self._scheduler is not None:
+            queued = self._scheduler.queued
+        elif work_queue is not None and hasattr(work_queue, 'qsize'):
+            queued = work_queue.qsize()
+
+        pools = {}
+        seen = set()
+        adapters = [a for s in self._sessions() for a in s.adapters.values()]
+        for adapter in adapters:
+            if id(adapter) in seen or not hasattr(adapter, 'pool_stats'):
+                continue
+            seen.add(id(adapter))
+            for key, stats in adapter.pool_stats().items():
+                totals = pools.setdefault(key, {})
+                for name, value in stats.items():
+                    totals[name] = totals.get(name, 0) + value
+
+        return {
+            'pending': self._pending,
+            'active': None if self._active is None else self._active.value,
+            'queued': queued,
+            'max_workers': getattr(self.executor, '_max_workers', None),
+            'limit': None if self.limiter is None else self.limiter.limit,
+            'circuits': (
+                {}
+                if self.circuit_breaker is None
+                else self.circuit_breaker.states()
+            ),
+            'pools': pools,
+        }
+
+    def _release_pending(self, future=None):
+        with self._pending_lock:
+            self._pending -= 1
+        if self._pending_slots is not None:
+            self._pending_slots.release()
+
+    def map(
+        self, specs, max_in_flight=None, return_exceptions=False, deadline=None
+    ):
+        """Sends a request for each of `specs`, yielding responses in order.
+
+        `specs` may be any iterable, including a lazy one, of urls, mappings
+        of `request` kwargs, or `(method, url[, kwargs])` tuples. At most
+        `max_in_flight` requests, by default the executor's worker count, are
+        submitted at any one time and a response is released as soon as it
+        has been handed out so memory stays flat however long `specs` is.
+
+        If a request fails its exception is raised from the iterator and
+        remaining queued requests are cancelled, unless `return_exceptions`
+        is set in which case the exception is yielded in its place.
+
+        `deadline`, seconds from now or a Deadline, applies to the batch as
+        a whole. Requests without a deadline of their own that haven't been
+        sent by then fail with `DeadlineExceeded`.
+
+        :rtype : generator of requests.Response
+        """
+        return self._map(
+            specs, max_in_flight, return_exceptions, True, deadline
+        )
+
+    def imap_unordered(
+        self, specs, max_in_flight=None, return_exceptions=False, deadline=None
+    ):
+        """Like `map`, but yields responses as they complete.
+
+        :rtype : generator of requests.Response
+        """
+        return self._map(
+            specs, max_in_flight, return_exceptions, False, deadline
+        )
+
+    def _map(self, specs, max_in_flight, return_exceptions, ordered, deadline):
+        deadline = _as_deadline(deadline)
+        if max_in_flight is None:
+            max_in_flight = getattr(self.executor, '_max_workers', 8)
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        specs = iter(specs)
+        pending = deque() if ordered else set()
+        done = deque()
+        add = pending.append if ordered else pending.add
+        try:
+            while True:
+                while len(pending) < max_in_flight:
+                    spec = next(specs, None)
+                    if spec is None:
+                        break
+                    args, kwargs = _request_args(spec)
+                    if deadline is not None:
+                        kwargs.setdefault('deadline', deadline)
+                    add(self.request(*args, **kwargs))
+                if not pending:
+                    return
+                if ordered:
+                    done.append(pending.popleft())
+                else:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pending -= finished
+                    done.extend(finished)
+                while done:
+                    future = done.popleft()
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        result = e
+                    # don't hang on to the response once it's been handed out
+                    del future
+                    yield result
+                    del result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def warm(self, hosts, connections=1):
+        """Opens up to `connections` connections to each of `hosts`, e.g.
+        `https://api.example.com`, and leaves them idle in the adapters'
+        pools ready for the requests that follow. Connections already open
+        count towards the total and no more than a pool holds are opened.
+
+        The connects, including any TLS handshakes, happen on the executor,
+        which needs to be running threads.
+
+        :rtype : concurrent.futures.Future resolving to the number of
+          connections opened
+        """
+        if self._active is None:
+            raise RuntimeError('connections can only be warmed on threads')
+        futures = []
+        for url in hosts:
+            pool = self._connection_pool(url)
+            size = connections
+            if pool.pool is not None:
+                size = min(size, pool.pool.maxsize)
+            # checked out all at once so that each is a different one
+            for conn in [pool._get_conn() for _ in range(size)]:
+                futures.append(self.executor.submit(_open, pool, conn))
+        return _gathered(futures, sum)
+
+    def _connection_pool(self, url):
+        """Returns the pool a request to `url` would use"""
+        adapter = self.get_adapter(url)
+        settings = self.merge_environment_settings(
+            url, {}, None, self.verify, self.cert
+        )
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            request = PreparedRequest()
+            request.prepare(method='GET', url=url)
+            return adapter.get_connection_with_tls_context(
+                request,
+                settings['verify'],
+                settings['proxies'],
+                settings['cert'],
+            )
+        # requests < 2.32
+        return adapter.get_connection(url, settings['proxies'])
+
+    def download(
+        self,
+        url,
+        filename,
+        part_size=DEFAULT_PART_SIZE,
+        checksum=None,
+        resume=True,
+        **kwargs
+    ):
+        """Downloads `url` to `filename` without holding it in memory.
+
+        A HEAD finds out the size and whether the server supports ranges. If
+        it does the file is preallocated and fetched in `part_size` ranges
+        concurrently, each written straight to its place in the file,
+        otherwise it's streamed to the file by a single request. Progress is
+        kept alongside in `filename` + `.download` and, with `resume`, a later
+        download of the same, unchanged, url picks up where it left off.
+
+        `checksum`, e.g. `sha256:<hexdigest>`, is checked once the file is
+        complete and `requests_futures.downloads.ChecksumError` raised if it
+        doesn't match. Other kwargs are passed to each request.
+
+        :rtype : concurrent.futures.Future resolving to `filename`
+        """
+        if kwargs.get('deadline') is not None:
+            # one for the whole download rather than each part
+            kwargs['deadline'] = _as_deadline(kwargs['deadline'])
+        future = Download(
+            self, url, filename, part_size, checksum, resume, kwargs
+        ).start()
+        self._attempts.add(future)
+        future.add_done_callback(self._attempts.discard)
+        return future
+
+    def close(self, cancel_futures=False, abort=False):
+        """Waits for outstanding requests, then closes the adapters and shuts
+        down the executors the session created.
+
+        With `cancel_futures` requests that haven't started yet are cancelled,
+        along with anything buffered by a BatchSender, rather than waited
+        for. `abort` does the same and also shuts the connections of requests
+        that are in flight, on the default adapters, so that they fail with a
+        ConnectionError straight away. Requests running on processes can't
+        be aborted.
+        """
+        cancel_futures = cancel_futures or abort
+        for batcher in list(self._batchers):
+            if cancel_futures:
+                batcher.close(timeout=0, cancel_futures=True)
+            else:
+                batcher.close()
+        if cancel_futures:
+            self._cancel_pending()
+        shared = self._shared_resources
+        shared_adapters = list(shared.adapters.values()) if shared else []
+        if abort:
+            for session in self._sessions():
+                for adapter in list(session.adapters.values()):
+                    # other sessions' requests are using the shared ones
+                    if hasattr(adapter, 'abort') and (
+                        adapter not in shared_adapters
+                    ):
+                        adapter.abort()
+        # scheduled retries, and downloads, still need the executor
+        wait(list(self._attempts))
+        # as do requests held back by rate limits
+        if self._scheduler is not None:
+            self._scheduler.join()
+        self._timer.stop()
+        if shared is not None:
+            # the executor won't be shut down, wait for our requests instead
+            wait(list(self._submitted))
+            # and the adapters are left for the registry to close
+            for prefix, adapter in shared.adapters.items():
+                if self.adapters.get(prefix) is adapter:
+                    del self.adapters[prefix]
         super(FuturesSession, self).close()
         if self._owned_executor:
-            self.executor.shutdown()
+            if cancel_futures:
+                self.executor.shutdown(cancel_futures=True)
+            else:
+                self.executor.shutdown()
+        for session in list(self._thread_sessions):
+            session.close()
+        # after the requests that might still be feeding it
+        if self._owned_process_executor and self._process_executor is not None:
+            self._process_executor.shutdown()
+        if shared is not None:
+            self._shared_resources = None
+            registry.release(self.shared)
+
+    def _cancel_pending(self):
+        # retries first so that they don't submit anything new
+        for future in list(self._attempts):
+            future.cancel()
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+        for future in list(self._submitted):
+            future.cancel()
 
     def get(self, url, **kwargs):
         r"""
@@ -196,3 +2213,144 @@ class FuturesSession(Session):
         :rtype : concurrent.futures.Future
         """
         return super(FuturesSession, self).delete(url, **kwargs)
+
+
+async def _aiter(specs):
+    if hasattr(specs, '__aiter__'):
+        async for spec in specs:
+            yield spec
+    else:
+        for spec in specs:
+            yield spec
+
+
+class AsyncFuturesSession(FuturesSession):
+    """A FuturesSession for use from asyncio code.
+
+    Requests run on the same executor, with the same adapters, as a
+    FuturesSession but return asyncio futures bound to the running event loop
+    so they can be awaited directly. `map` and `imap_unordered` are async
+    generators for use with `async for`.
+
+    Blocking for a `max_pending` slot would stall the event loop, use a
+    `pending_timeout` of 0 to get `SaturatedError` instead.
+
+        async with AsyncFuturesSession() as session:
+            response = await session.get('http://httpbin.org/get')
+    """
+
+    def request(self, *args, **kwargs):
+        """Maintains the existing api for Session.request.
+
+        The `await_timeout` param limits how long, in seconds, the request
+        may take from submission to completion. When it passes
+        `asyncio.TimeoutError` is raised and the request is cancelled if it
+        hasn't been started yet.
+
+        :rtype : asyncio.Future
+        """
+        await_timeout = kwargs.pop('await_timeout', None)
+        loop = asyncio.get_running_loop()
+        future = super(AsyncFuturesSession, self).request(*args, **kwargs)
+        future = asyncio.wrap_future(future, loop=loop)
+        if await_timeout is not None:
+            future = asyncio.ensure_future(
+                asyncio.wait_for(future, await_timeout)
+            )
+        return future
+
+    async def map(
+        self, specs, max_in_flight=None, return_exceptions=False, deadline=None
+    ):
+        """Async version of `FuturesSession.map`, `specs` may also be an
+        async iterable.
+
+        :rtype : async generator of requests.Response
+        """
+        async for result in self._amap(
+            specs, max_in_flight, return_exceptions, True, deadline
+        ):
+            yield result
+
+    async def imap_unordered(
+        self, specs, max_in_flight=None, return_exceptions=False, deadline=None
+    ):
+        """Async version of `FuturesSession.imap_unordered`, `specs` may
+        also be an async iterable.
+
+        :rtype : async generator of requests.Response
+        """
+        async for result in self._amap(
+            specs, max_in_flight, return_exceptions, False, deadline
+        ):
+            yield result
+
+    async def _amap(
+        self, specs, max_in_flight, return_exceptions, ordered, deadline
+    ):
+        deadline = _as_deadline(deadline)
+        if max_in_flight is None:
+            max_in_flight = getattr(self.executor, '_max_workers', 8)
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        specs = _aiter(specs)
+        pending = deque() if ordered else set()
+        done = deque()
+        add = pending.append if ordered else pending.add
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        spec = await specs.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    args, kwargs = _request_args(spec)
+                    if deadline is not None:
+                        kwargs.setdefault('deadline', deadline)
+                    add(self.request(*args, **kwargs))
+                if not pending:
+                    return
+                if ordered:
+                    done.append(pending.popleft())
+                else:
+                    finished, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    pending -= finished
+                    done.extend(finished)
+                while done:
+                    future = done.popleft()
+                    try:
+                        result = await future
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        result = e
+                    del future
+                    yield result
+                    del result
+        finally:
+            for future in pending:
+                future.cancel()
+            await specs.aclose()
+
+    async def aclose(self, cancel_futures=False, abort=False):
+        """Closes the session without blocking the event loop.
+
+        Outstanding requests are waited for, unless `cancel_futures` is set
+        in which case any that haven't started yet are cancelled first, or
+        `abort` is in which case in flight requests' connections are shut
+        too, see `FuturesSession.close`.
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.close, cancel_futures, abort)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+requests_futures.shared
+~~~~~~~~~~~~~~~~~~~~~~~
+
+A process-wide registry of executors and connection pools that FuturesSessions
+can share by name. Lots of short-lived sessions, e.g. one per tenant or job,
+then cost next to nothing to create and reuse each other's worker threads and
+open connections. Each name's resources are created by the first session to
+use it and shut down when the last session using it is closed.
+
+    from requests_futures.sessions import FuturesSession
+
+    def handle(job):
+        with FuturesSession(shared='jobs', max_workers=32) as session:
+            session.headers['Authorization'] = job.token
+            return [f.result() for f in [session.get(u) for u in job.urls]]
+
+"""
+
+from threading import Lock
+
+from .adapters import FuturesHTTPAdapter
+
+
+class SharedResources(object):
+    """An executor and the adapters for `http://` and `https://` that are
+    shared by the sessions using them. Threads are only started as work is
+    submitted to the executor and connections as requests need them."""
+
+    def __init__(self, executor, adapter_kwargs=None):
+        self.executor = executor
+        self.adapters = {
+            prefix: FuturesHTTPAdapter(**(adapter_kwargs or {}))
+            for prefix in ('https://', 'http://')
+        }
+        self.users = 0
+
+    def close(self):
+        self.executor.shutdown()
+        for adapter in self.adapters.values():
+            adapter.close()
+
+
+class SharedRegistry(object):
+    """Reference counted SharedResources by name"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = Lock()
+
+    def acquire(self, name, factory):
+        """Returns the resources for `name`, calling `factory` to create them
+        if nobody's using them yet, and counts the caller as a user"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = factory()
+            entry.users += 1
+            return entry
+
+    def release(self, name):
+        """Stops counting a caller as a user of `name`, shutting its
+        resources down if it was the last one"""
+        with self._lock:
+            entry = self._entries[name]
+            entry.users -= 1
+            if entry.users:
+                return
+            del self._entries[name]
+        # outside the lock, the executor may take a while to finish up
+        entry.close()
+
+    def users(self, name):
+        """The number of sessions using `name`, 0 if it doesn't exist"""
+        with self._lock:
+            entry = self._entries.get(name)
+            return 0 if entry is None else entry.users
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._entries
+
+
+# the one FuturesSession uses
+registry = SharedRegistry()
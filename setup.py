@@ -37,7 +37,8 @@ setup(
             'pyflakes>=2.2.0',
             'readme_renderer[rst]>=26.0',
             'twine>=3.4.2',
-        )
+        ),
+        'http2': ('httpx[http2]>=0.26.0',),
     },
     long_description=open('README.rst').read(),
     long_description_content_type='text/x-rst',
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for connection warming and DNS caching."""
+
+import pickle
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socket import getaddrinfo
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from requests_futures.adapters import DNSCache, FuturesHTTPAdapter
+from requests_futures.sessions import FuturesSession
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class DNSCacheTestCase(TestCase):
+    def test_resolve(self):
+        cache = DNSCache(ttl=10)
+        # addresses are passed straight through
+        self.assertEqual(['127.0.0.1'], cache.resolve('127.0.0.1', 80))
+        self.assertEqual(['::1'], cache.resolve('::1', 80))
+        self.assertEqual(0, len(cache))
+
+        with patch('socket.getaddrinfo') as getaddrinfo:
+            getaddrinfo.return_value = [
+                (2, 1, 6, '', ('10.0.0.1', 80)),
+                (2, 1, 6, '', ('10.0.0.2', 80)),
+                (2, 1, 6, '', ('10.0.0.1', 80)),
+            ]
+            self.assertEqual(
+                ['10.0.0.1', '10.0.0.2'],
+                cache.resolve('example.com', 80, now=100),
+            )
+            cache.resolve('example.com', 80, now=109)
+            self.assertEqual(1, getaddrinfo.call_count)
+            # expired
+            cache.resolve('example.com', 80, now=110)
+            self.assertEqual(2, getaddrinfo.call_count)
+            cache.forget('example.com', 80)
+            cache.resolve('example.com', 80, now=111)
+            self.assertEqual(3, getaddrinfo.call_count)
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_pickle(self):
+        adapter = FuturesHTTPAdapter(dns_cache=DNSCache(ttl=5))
+        adapter = pickle.loads(pickle.dumps(adapter))
+        self.assertEqual(5, adapter.dns_cache.ttl)
+        self.assertIs(adapter.dns_cache, adapter.poolmanager.dns_cache)
+
+
+class WarmTestCase(TestCase):
+    def test_dns_cache(self):
+        sess = FuturesSession(dns_cache=True)
+        cache = sess.get_adapter('http://').dns_cache
+        self.assertIsInstance(cache, DNSCache)
+        self.assertIs(cache, sess.get_adapter('https://').dns_cache)
+
+        url = 'http://localhost:{}/get'.format(self.httpbin.port)
+        self.assertEqual(200, sess.get(url).result().status_code)
+        self.assertEqual(1, len(cache))
+        with patch('socket.getaddrinfo', side_effect=getaddrinfo) as lookup:
+            # a second connection doesn't look it up again
+            sess.close()
+            sess = FuturesSession(dns_cache=cache)
+            self.assertEqual(200, sess.get(url).result().status_code)
+            self.assertNotIn(
+                'localhost', [c[0][0] for c in lookup.call_args_list]
+            )
+
+        # when none of the addresses work they're forgotten
+        cache._entries[('localhost', 1)] = (float('inf'), ['127.0.0.1'])
+        with self.assertRaises(Exception):
+            sess.get('http://localhost:1/').result()
+        self.assertNotIn(('localhost', 1), cache._entries)
+        sess.close()
+
+    def test_warm(self):
+        # httpbin's server handles one connection at a time, so would sit
+        # waiting on the first idle one
+        server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        host = 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+        sess = FuturesSession(max_workers=4)
+        self.assertEqual(3, sess.warm([host], connections=3).result())
+        stats = sess.metrics()['pools'][host]
+        self.assertEqual(3, stats['idle'])
+        self.assertEqual(0, stats['in_use'])
+
+        # requests use them, and they're not opened twice
+        self.assertEqual(200, sess.get(host + '/').result().status_code)
+        self.assertEqual(3, sess.metrics()['pools'][host]['idle'])
+        self.assertEqual(1, sess.warm([host], connections=4).result())
+        # no more than the pool holds
+        self.assertEqual(6, sess.warm([host], connections=20).result())
+        self.assertEqual(10, sess.metrics()['pools'][host]['idle'])
+
+        self.assertEqual(0, sess.warm([]).result())
+        with self.assertRaises(Exception):
+            sess.warm(['http://127.0.0.1:1'], connections=2).result()
+        sess.close()
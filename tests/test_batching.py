@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for batching sends."""
+
+import json
+from concurrent.futures import Future
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from requests_futures.batching import (
+    BatchSender,
+    JSONArrayEncoder,
+    NDJSONEncoder,
+)
+from requests_futures.sessions import (
+    AsyncFuturesSession,
+    FuturesSession,
+    SaturatedError,
+)
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class EncoderTestCase(TestCase):
+    def test_ndjson(self):
+        encoder = NDJSONEncoder()
+        encoded = [encoder.encode_item(i) for i in ({'a': 1}, [2], 'three')]
+        self.assertEqual(b'{"a":1}\n[2]\n"three"\n', encoder.join(encoded))
+
+    def test_json_array(self):
+        encoder = JSONArrayEncoder()
+        encoded = [encoder.encode_item(i) for i in ({'a': 1}, [2], 'three')]
+        self.assertEqual(
+            [{'a': 1}, [2], 'three'], json.loads(encoder.join(encoded))
+        )
+
+
+class BatchSenderTestCase(TestCase):
+    def setUp(self):
+        self.session = FuturesSession(max_workers=2)
+
+    def tearDown(self):
+        self.session.close()
+
+    def posted(self, resp):
+        return [json.loads(line) for line in resp.json()['data'].splitlines()]
+
+    def test_max_items(self):
+        sender = BatchSender(
+            self.session, self.httpbin.join('post'), max_items=3, max_delay=60
+        )
+        futures = [sender.send({'i': i}) for i in range(7)]
+        # two full batches have gone, the last item's waiting
+        self.assertEqual(1, sender.buffered)
+        first = futures[0].result()
+        self.assertIs(first, futures[2].result())
+        self.assertEqual(
+            'application/x-ndjson', first.request.headers['Content-Type']
+        )
+        self.assertEqual([{'i': 0}, {'i': 1}, {'i': 2}], self.posted(first))
+        self.assertEqual(
+            [{'i': 3}, {'i': 4}, {'i': 5}], self.posted(futures[3].result())
+        )
+        self.assertFalse(futures[6].done())
+        sender.close()
+        self.assertEqual([{'i': 6}], self.posted(futures[6].result()))
+
+    def test_max_bytes(self):
+        sender = BatchSender(
+            self.session,
+            self.httpbin.join('post'),
+            encoder=JSONArrayEncoder(),
+            max_bytes=20,
+            max_delay=60,
+        )
+        # 9 bytes each once encoded, the third doesn't fit
+        futures = [sender.send('x' * 7) for _ in range(3)]
+        resp = futures[0].result()
+        self.assertEqual(
+            'application/json', resp.request.headers['Content-Type']
+        )
+        self.assertEqual(['x' * 7] * 2, resp.json()['json'])
+        self.assertEqual(1, sender.buffered)
+        sender.close()
+        self.assertEqual(['x' * 7], futures[2].result().json()['json'])
+
+    def test_max_delay(self):
+        sender = BatchSender(
+            self.session, self.httpbin.join('post'), max_delay=0.1
+        )
+        futures = [sender.send(i) for i in range(3)]
+        # nothing else is sent, the timer sends them
+        resp = futures[0].result(timeout=5)
+        self.assertEqual([0, 1, 2], self.posted(resp))
+        self.assertEqual(0, sender.buffered)
+        # the next batch gets a timer of its own
+        future = sender.send(3)
+        self.assertEqual([3], self.posted(future.result(timeout=5)))
+
+    def test_async_session(self):
+        session = AsyncFuturesSession()
+        sender = BatchSender(session, self.httpbin.join('post'), max_delay=0.1)
+        # sent by the flusher, outside of any event loop
+        future = sender.send('async')
+        self.assertEqual(['async'], self.posted(future.result(timeout=5)))
+        sender.close()
+        session.close()
+
+    def test_no_futures(self):
+        sender = BatchSender(
+            self.session, self.httpbin.join('post'), futures=False
+        )
+        self.assertIsNone(sender.send(1))
+        with patch.object(
+            FuturesSession, 'request', wraps=FuturesSession.request
+        ) as request:
+            sender.close()
+        self.assertEqual(1, request.call_count)
+        self.assertEqual(b'1\n', request.call_args[1]['data'])
+
+    def test_saturated(self):
+        blocked = Future()
+        with patch.object(FuturesSession, 'request', return_value=blocked):
+            sender = BatchSender(
+                self.session,
+                self.httpbin.join('post'),
+                max_items=2,
+                max_buffered=2,
+                timeout=0,
+            )
+            futures = [sender.send(i) for i in range(2)]
+            with self.assertRaises(SaturatedError):
+                sender.send(2)
+            # the batch completing frees up room
+            blocked.set_result('done')
+            self.assertEqual('done', futures[1].result())
+            sender.send(2)
+
+    def test_failure(self):
+        sender = BatchSender(self.session, 'http://invalid.invalid/post')
+        future = sender.send(1)
+        sender.close()
+        with self.assertRaises(ConnectionError):
+            future.result()
+
+    def test_close(self):
+        url = self.httpbin.join('post')
+        with BatchSender(self.session, url, max_delay=60) as sender:
+            futures = [sender.send(i) for i in range(5)]
+        # everything's been sent and completed
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual([0, 1, 2, 3, 4], self.posted(futures[0].result()))
+        with self.assertRaises(RuntimeError):
+            sender.send(5)
+
+    def test_session_close(self):
+        sender = BatchSender(
+            self.session, self.httpbin.join('post'), max_delay=60
+        )
+        future = sender.send('last')
+        self.session.close()
+        self.assertTrue(sender.closed)
+        self.assertEqual(['last'], self.posted(future.result(timeout=0)))
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            BatchSender(self.session, 'http://a/', max_items=0)
+        with self.assertRaises(ValueError):
+            BatchSender(self.session, 'http://a/', max_items=10, max_buffered=5)
+        # nothing waiting, nothing to do
+        sender = BatchSender(self.session, 'http://a/')
+        sender.flush()
+        sender.close()
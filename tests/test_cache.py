@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for response caching."""
+
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import pytest
+from requests import Response
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+from requests_futures.cache import (
+    BaseCache,
+    CacheEntry,
+    FileCache,
+    MemoryCache,
+    parse_cache_control,
+)
+from requests_futures.sessions import FuturesSession
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+def make_response(content=b'hello', headers=None, status_code=200):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp._content = content
+    resp.url = 'http://example.com/'
+    resp.request = PreparedRequest()
+    resp.request.prepare(method='GET', url=resp.url)
+    return resp
+
+
+class CacheEntryTestCase(TestCase):
+    def test_parse_cache_control(self):
+        self.assertEqual(
+            {'max-age': '60', 'public': True, 'no-cache': True},
+            parse_cache_control(
+                {'Cache-Control': 'max-age=60, Public, no-cache'}
+            ),
+        )
+        self.assertEqual({}, parse_cache_control({}))
+
+    def test_freshness(self):
+        headers = {'Cache-Control': 'max-age=60, stale-while-revalidate=30'}
+        entry = CacheEntry.from_response(make_response(headers=headers), {})
+        self.assertTrue(entry.fresh(entry.expires - 1))
+        self.assertFalse(entry.fresh(entry.expires))
+        self.assertTrue(entry.usable_stale(entry.expires + 29))
+        self.assertFalse(entry.usable_stale(entry.expires + 30))
+
+        headers = {
+            'Date': 'Mon, 01 Jan 2024 00:00:00 GMT',
+            'Expires': 'Mon, 01 Jan 2024 00:01:00 GMT',
+        }
+        entry = CacheEntry.from_response(
+            make_response(headers=headers), {}, now=100
+        )
+        self.assertEqual(160, entry.expires)
+
+    def test_uncacheable(self):
+        for headers in (
+            {'Cache-Control': 'no-store, max-age=60'},
+            {'Cache-Control': 'max-age=60', 'Vary': '*'},
+            # stale and no way to revalidate
+            {'Cache-Control': 'no-cache'},
+            {},
+        ):
+            self.assertIsNone(
+                CacheEntry.from_response(make_response(headers=headers), {})
+            )
+        resp = make_response(
+            headers={'Cache-Control': 'max-age=60'}, status_code=500
+        )
+        self.assertIsNone(CacheEntry.from_response(resp, {}))
+
+        # no-cache with a validator is stored, but always revalidated
+        entry = CacheEntry.from_response(
+            make_response(headers={'Cache-Control': 'no-cache', 'ETag': 'x'}),
+            {},
+        )
+        self.assertFalse(entry.fresh())
+        self.assertEqual({'If-None-Match': 'x'}, entry.validators)
+
+    def test_vary(self):
+        headers = {'Cache-Control': 'max-age=60', 'Vary': 'Accept'}
+        entry = CacheEntry.from_response(
+            make_response(headers=headers),
+            CaseInsensitiveDict({'Accept': 'text/plain'}),
+        )
+        self.assertTrue(
+            entry.matches(CaseInsensitiveDict({'accept': 'text/plain'}))
+        )
+        self.assertFalse(entry.matches(CaseInsensitiveDict({})))
+
+
+class CacheBackendTestCase(TestCase):
+    def entry(self, content=b'hello'):
+        return CacheEntry.from_response(
+            make_response(content, {'Cache-Control': 'max-age=60'}), {}
+        )
+
+    def test_memory_cache(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', self.entry())
+        cache.set('b', self.entry())
+        # a is now the most recently used
+        self.assertIsNotNone(cache.get('a'))
+        cache.set('c', self.entry())
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.stats.evictions)
+        cache.delete('a')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.bytes)
+
+        entry = self.entry(b'x' * 100)
+        cache = MemoryCache(max_bytes=entry.size * 2)
+        for key in 'abc':
+            cache.set(key, self.entry(b'x' * 100))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(entry.size * 2, cache.bytes)
+        # too big to ever fit
+        cache.set('d', self.entry(b'x' * 1000))
+        self.assertIsNone(cache.get('d'))
+
+    def test_base_cache(self):
+        with self.assertRaises(TypeError):
+            BaseCache()
+
+        class Partial(BaseCache):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+    def test_file_cache(self):
+        with TemporaryDirectory() as directory:
+            cache = FileCache(directory)
+            self.assertIsNone(cache.get('a'))
+            cache.set('a', self.entry(b'persisted'))
+            # a new instance sees what the first stored
+            entry = FileCache(directory).get('a')
+            self.assertEqual(b'persisted', entry.content)
+            self.assertEqual(b'persisted', entry.response().content)
+            cache.delete('a')
+            cache.delete('a')
+            self.assertIsNone(cache.get('a'))
+            cache.set('b', self.entry())
+            cache.clear()
+            self.assertIsNone(cache.get('b'))
+
+            # corrupt entries are misses, and cleaned up
+            for garbage in (b'garbage', b'\x80\x05garbage', b''):
+                cache.set('c', self.entry())
+                with open(cache._path('c'), 'wb') as fh:
+                    fh.write(garbage)
+                self.assertIsNone(cache.get('c'))
+                self.assertFalse(path.exists(cache._path('c')))
+
+
+class CachedSessionTestCase(TestCase):
+    def test_fresh_hits(self):
+        cache = MemoryCache()
+        sess = FuturesSession(cache=cache)
+        url = self.httpbin.join('cache/60')
+        resp = sess.get(url).result()
+        self.assertEqual(200, resp.status_code)
+        self.assertFalse(hasattr(resp, 'from_cache'))
+
+        future = sess.get(url)
+        # answered without going anywhere near the executor
+        self.assertTrue(future.done())
+        self.assertEqual(0, sess.pending)
+        cached = future.result()
+        self.assertTrue(cached.from_cache)
+        self.assertEqual(resp.json(), cached.json())
+        self.assertEqual(url, cached.request.url)
+        self.assertEqual(1, cache.stats.hits)
+        self.assertEqual(1, cache.stats.misses)
+
+        # params are part of the key, non-GETs skip the cache
+        sess.get(url, params={'a': 1}).result()
+        self.assertEqual(2, cache.stats.misses)
+        sess.post(self.httpbin.join('post')).result()
+        self.assertEqual(2, len(cache))
+
+        # as are requests with their own credentials or routing
+        for kwargs in (
+            {'auth': ('user', 'pass')},
+            {'cookies': {'a': 'b'}},
+            {'proxies': {'https': 'http://127.0.0.1:1'}},
+        ):
+            resp = sess.get(url, **kwargs).result()
+            self.assertFalse(hasattr(resp, 'from_cache'))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.stats.hits)
+
+    def test_revalidation(self):
+        cache = MemoryCache()
+        sess = FuturesSession(cache=cache)
+        url = self.httpbin.join('etag/abc')
+        resp = sess.get(url).result()
+        self.assertEqual(200, resp.status_code)
+
+        resp = sess.get(url).result()
+        self.assertEqual(200, resp.status_code)
+        self.assertTrue(resp.from_cache)
+        self.assertEqual(1, cache.stats.revalidated)
+        # the conditional request went out
+        self.assertIn('abc', resp.request.headers['If-None-Match'])
+
+    def test_uncacheable(self):
+        cache = MemoryCache()
+        sess = FuturesSession(cache=cache)
+        url = self.httpbin.join('response-headers')
+        params = {'Cache-Control': 'no-store'}
+        sess.get(url, params=params).result()
+        sess.get(url, params=params).result()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(2, cache.stats.misses)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for consuming streamed response bodies."""
+
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+import pytest
+from requests.exceptions import HTTPError
+
+from requests_futures.consumers import Consumer, LineConsumer, NDJSONConsumer
+from requests_futures.sessions import FuturesSession
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class Chunks(Consumer):
+    chunk_size = 1024
+
+    def __init__(self):
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(bytes(chunk))
+
+    def close(self):
+        return b''.join(self.chunks)
+
+
+class LineConsumerTestCase(TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            Consumer()
+
+    def test_lines(self):
+        lines = []
+        consumer = LineConsumer(lines.append)
+        for chunk in (b'one\ntw', b'o\r\n', b'\nthr', b'e', b'e\nfour'):
+            consumer.feed(chunk)
+        self.assertEqual([b'one', b'two', b'three'], lines)
+        # the unfinished line comes out at the end
+        self.assertEqual(4, consumer.close())
+        self.assertEqual([b'one', b'two', b'three', b'four'], lines)
+
+    def test_delimiter(self):
+        lines = []
+        consumer = LineConsumer(lines.append, delimiter=b'||')
+        consumer.feed(memoryview(b'a||b|'))
+        consumer.feed(bytearray(b'|c||'))
+        self.assertEqual(3, consumer.close())
+        self.assertEqual([b'a', b'b', b'c'], lines)
+
+    def test_max_line(self):
+        consumer = LineConsumer(max_line=4)
+        consumer.feed(b'1234\n12')
+        with self.assertRaises(ValueError):
+            consumer.feed(b'345')
+
+    def test_ndjson(self):
+        records = []
+        consumer = NDJSONConsumer(records.append)
+        consumer.feed(b'{"a": 1}\n[2')
+        consumer.feed(b']\n"three"\n')
+        self.assertEqual(3, consumer.close())
+        self.assertEqual([{'a': 1}, [2], 'three'], records)
+
+
+class SessionConsumerTestCase(TestCase):
+    def test_consumer(self):
+        records = []
+        with FuturesSession() as session:
+            future = session.get(
+                self.httpbin.join('stream/20'),
+                consumer=NDJSONConsumer(records.append),
+            )
+            self.assertEqual(20, future.result())
+        self.assertEqual(list(range(20)), [r['id'] for r in records])
+
+    def test_as_it_arrives(self):
+        consumer = Chunks()
+        with FuturesSession() as session:
+            body = session.get(
+                self.httpbin.join('drip'),
+                params={'numbytes': 4, 'duration': 0.4, 'delay': 0},
+                consumer=consumer,
+            ).result()
+        self.assertEqual(b'****', body)
+        # fed as the bytes turned up, not once they all had
+        self.assertLess(1, len(consumer.chunks))
+
+    def test_decoded(self):
+        with FuturesSession() as session:
+            body = session.get(
+                self.httpbin.join('gzip'), consumer=Chunks()
+            ).result()
+        self.assertIn(b'"gzipped": true', body)
+
+    def test_error_status(self):
+        consumer = Chunks()
+        with FuturesSession(retries=2) as session:
+            future = session.get(
+                self.httpbin.join('status/404'), consumer=consumer
+            )
+            with self.assertRaises(HTTPError) as ctx:
+                future.result()
+        self.assertEqual(404, ctx.exception.response.status_code)
+        self.assertEqual([], consumer.chunks)
+
+    def test_not_shared(self):
+        url = self.httpbin.join('get')
+        with FuturesSession(coalesce=True, retries=2) as session:
+            first = session.get(url, consumer=Chunks())
+            second = session.get(url, consumer=Chunks())
+            self.assertIn(b'"url"', first.result())
+            self.assertIn(b'"url"', second.result())
+
+    def test_validation(self):
+        with FuturesSession() as session:
+            with self.assertRaises(ValueError):
+                session.get('http://a/', consumer=Chunks(), process=len)
+        with FuturesSession(executor=ProcessPoolExecutor(1)) as session:
+            with self.assertRaises(ValueError):
+                session.get('http://a/', consumer=Chunks())
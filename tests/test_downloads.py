@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for ranged downloads."""
+
+import json
+from hashlib import sha256
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import pytest
+
+from requests_futures.downloads import ChecksumError, Download
+from requests_futures.sessions import FuturesSession
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+def expected(size):
+    # what httpbin's /range serves
+    return bytes(ord('a') + (i % 26) for i in range(size))
+
+
+class DownloadTestCase(TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.filename = path.join(self.tmp.name, 'out')
+        self.session = FuturesSession(max_workers=4)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.filename, 'rb') as fh:
+            return fh.read()
+
+    def test_ranged(self):
+        ranges = []
+
+        def hook(resp, *args, **kwargs):
+            ranges.append(resp.request.headers.get('Range'))
+
+        url = self.httpbin.join('range/10000')
+        future = self.session.download(
+            url,
+            self.filename,
+            part_size=3000,
+            checksum='sha256:' + sha256(expected(10000)).hexdigest(),
+            hooks={'response': hook},
+        )
+        self.assertEqual(self.filename, future.result())
+        self.assertEqual(expected(10000), self.read())
+        self.assertEqual(
+            [
+                'bytes=0-2999',
+                'bytes=3000-5999',
+                'bytes=6000-8999',
+                'bytes=9000-9999',
+            ],
+            sorted(r for r in ranges if r),
+        )
+        # the HEAD, and its progress is cleaned up
+        self.assertIn(None, ranges)
+        self.assertFalse(path.exists(self.filename + '.download'))
+
+    def test_max_pending(self):
+        session = FuturesSession(max_workers=1, max_pending=2)
+        future = session.download(
+            self.httpbin.join('range/40000'), self.filename, part_size=8000
+        )
+        self.assertEqual(self.filename, future.result(timeout=5))
+        self.assertEqual(expected(40000), self.read())
+        session.close()
+
+    def test_resume(self):
+        url = self.httpbin.join('range/10000')
+        # an interrupted download of the first and last parts
+        with open(self.filename, 'wb') as fh:
+            fh.write(expected(3000))
+            fh.write(b'\0' * 6000)
+            fh.write(expected(10000)[9000:])
+        with open(self.filename + '.download', 'w') as fh:
+            json.dump(
+                {
+                    'url': url,
+                    'size': 10000,
+                    'part_size': 3000,
+                    'etag': 'range10000',
+                    'last_modified': None,
+                    'done': [0, 3],
+                },
+                fh,
+            )
+        ranges = []
+
+        def hook(resp, *args, **kwargs):
+            ranges.append(resp.request.headers.get('Range'))
+
+        self.session.download(
+            url, self.filename, part_size=3000, hooks={'response': hook}
+        ).result()
+        self.assertEqual(expected(10000), self.read())
+        self.assertEqual(
+            ['bytes=3000-5999', 'bytes=6000-8999'],
+            sorted(r for r in ranges if r),
+        )
+
+        # with a different part size it starts over
+        ranges[:] = []
+        self.session.download(
+            url, self.filename, part_size=5000, hooks={'response': hook}
+        ).result()
+        self.assertEqual(expected(10000), self.read())
+        self.assertEqual(2, len([r for r in ranges if r]))
+
+    def test_redirected(self):
+        url = self.httpbin.join('redirect-to?url=/range/5000')
+        future = self.session.download(url, self.filename, part_size=1024)
+        self.assertEqual(self.filename, future.result())
+        self.assertEqual(expected(5000), self.read())
+
+        # small enough to be fetched in one go, through the redirect
+        url = self.httpbin.join('redirect-to?url=/range/500')
+        self.session.download(url, self.filename, part_size=1024).result()
+        self.assertEqual(expected(500), self.read())
+
+    def test_single(self):
+        # no Accept-Ranges, streamed in one go
+        url = self.httpbin.join('stream-bytes/5000?seed=1')
+        self.session.download(url, self.filename).result()
+        content = self.session.get(url).result().content
+        self.assertEqual(5000, len(content))
+        self.assertEqual(content, self.read())
+
+    def test_checksum(self):
+        url = self.httpbin.join('range/100')
+        with self.assertRaises(ChecksumError):
+            self.session.download(
+                url, self.filename, checksum='md5:00'
+            ).result()
+        self.assertFalse(path.exists(self.filename + '.download'))
+        with self.assertRaises(ValueError):
+            Download(self.session, url, self.filename, checksum='nope:00')
+        with self.assertRaises(ValueError):
+            Download(self.session, url, self.filename, checksum='sha256')
+
+    def test_failure(self):
+        with self.assertRaises(Exception):
+            self.session.download(
+                self.httpbin.join('status/404'), self.filename
+            ).result()
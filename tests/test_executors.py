@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for executors."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+import pytest
+
+from requests_futures import sessions
+from requests_futures.executors import (
+    FREE_THREADED,
+    INTERPRETERS,
+    THREADS,
+    InterpreterPoolExecutor,
+    PriorityThreadPoolExecutor,
+    gil_disabled,
+    parallel_backend,
+    priority_key,
+)
+from requests_futures.sessions import FuturesSession
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class FakeInterpreterPoolExecutor(ThreadPoolExecutor):
+    """Runs the initializer in each thread, as InterpreterPoolExecutor does
+    in each interpreter, but shares everything"""
+
+
+class PriorityThreadPoolExecutorTestCase(TestCase):
+    def blocked(self, executor):
+        started = Event()
+        release = Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        executor.submit(block)
+        started.wait()
+        return release
+
+    def test_priority_order(self):
+        executor = PriorityThreadPoolExecutor(max_workers=1, aging=0)
+        release = self.blocked(executor)
+        ran = []
+        futures = [
+            executor.submit(ran.append, 'default-1'),
+            executor.submit_priority(-5, ran.append, 'low'),
+            executor.submit_priority(10, ran.append, 'high'),
+            executor.submit(ran.append, 'default-2'),
+        ]
+        self.assertEqual(4, executor._work_queue.qsize())
+        release.set()
+        for future in futures:
+            future.result()
+        self.assertEqual(['high', 'default-1', 'default-2', 'low'], ran)
+        executor.shutdown()
+
+    def test_aging(self):
+        # a second of waiting is worth a priority point
+        self.assertEqual(
+            priority_key(0, 1.0, now=100), priority_key(1, 1.0, now=101)
+        )
+        self.assertTrue(
+            priority_key(0, 1.0, now=100) < priority_key(1, 1.0, now=102)
+        )
+        self.assertTrue(
+            priority_key(0, 0, now=100) > priority_key(1, 0, now=102)
+        )
+
+    def test_cancel(self):
+        executor = PriorityThreadPoolExecutor(max_workers=1)
+        release = self.blocked(executor)
+        ran = []
+        futures = [executor.submit(ran.append, i) for i in range(10)]
+        for future in futures[:6]:
+            self.assertTrue(future.cancel())
+        queue = executor._work_queue
+        self.assertEqual(4, queue.qsize())
+        # the heap was rebuilt once cancelled items were over half of it
+        self.assertEqual(4, len(queue._heap))
+        release.set()
+        for future in futures[6:]:
+            future.result()
+        self.assertEqual([6, 7, 8, 9], ran)
+        self.assertEqual(0, queue.qsize())
+        executor.shutdown()
+
+    def test_shutdown(self):
+        executor = PriorityThreadPoolExecutor(max_workers=2)
+        release = self.blocked(executor)
+        queued = executor.submit(lambda: 42)
+        release.set()
+        executor.shutdown()
+        self.assertEqual(42, queued.result())
+        with self.assertRaises(RuntimeError):
+            executor.submit(lambda: 42)
+
+        executor = PriorityThreadPoolExecutor(max_workers=1)
+        release = self.blocked(executor)
+        queued = executor.submit(lambda: 42)
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        release.set()
+
+        with self.assertRaises(ValueError):
+            PriorityThreadPoolExecutor(max_workers=0)
+
+
+class ParallelBackendTestCase(TestCase):
+    def test_detection(self):
+        with patch.object(sys, '_is_gil_enabled', lambda: False, create=True):
+            self.assertTrue(gil_disabled())
+            self.assertEqual(FREE_THREADED, parallel_backend())
+        with patch.object(sys, '_is_gil_enabled', lambda: True, create=True):
+            self.assertFalse(gil_disabled())
+            with patch(
+                'requests_futures.executors.InterpreterPoolExecutor',
+                FakeInterpreterPoolExecutor,
+            ):
+                self.assertEqual(INTERPRETERS, parallel_backend())
+                self.assertEqual(THREADS, parallel_backend(interpreters=False))
+            with patch(
+                'requests_futures.executors.InterpreterPoolExecutor', None
+            ):
+                self.assertEqual(THREADS, parallel_backend())
+
+    @skipIf(
+        gil_disabled() or InterpreterPoolExecutor is not None,
+        'runtime has a parallel backend',
+    )
+    def test_fallback(self):
+        sess = FuturesSession(max_workers=2, parallel=True)
+        self.assertEqual(THREADS, sess.backend)
+        self.assertIsInstance(sess.executor, ThreadPoolExecutor)
+        resp = sess.get(self.httpbin.join('get')).result()
+        self.assertEqual(200, resp.status_code)
+        sess.close()
+
+    def test_interpreters(self):
+        with patch(
+            'requests_futures.executors.InterpreterPoolExecutor',
+            FakeInterpreterPoolExecutor,
+        ), patch(
+            'requests_futures.sessions.InterpreterPoolExecutor',
+            FakeInterpreterPoolExecutor,
+        ), patch(
+            'requests_futures.executors.gil_disabled', lambda: False
+        ), patch(
+            'requests_futures.sessions.gil_disabled', lambda: False
+        ):
+            sess = FuturesSession(max_workers=2, parallel=True)
+            self.assertEqual(INTERPRETERS, sess.backend)
+            self.assertIsInstance(sess.executor, FakeInterpreterPoolExecutor)
+            # the worker's session is used, and there are no gauges to cross
+            self.assertIsNone(sess._active)
+            resp = sess.get(self.httpbin.join('get')).result()
+            self.assertEqual(200, resp.status_code)
+            sess.close()
+
+            # needs threads
+            sess = FuturesSession(parallel=True, priorities=True)
+            self.assertIsInstance(sess.executor, PriorityThreadPoolExecutor)
+            sess.close()
+        sessions._worker_session = None
+
+        with self.assertRaises(ValueError):
+            FuturesSession(parallel=True, use_processes=True)
+
+    @skipIf(InterpreterPoolExecutor is None, 'requires Python 3.14+')
+    def test_real_interpreters(self):
+        sess = FuturesSession(max_workers=2, parallel=True)
+        if not gil_disabled():
+            self.assertEqual(INTERPRETERS, sess.backend)
+        resp = sess.get(self.httpbin.join('get')).result()
+        self.assertEqual(200, resp.status_code)
+        sess.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the HTTP/2 adapter."""
+
+import json
+import pickle
+import socketserver
+from threading import Lock, Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from requests_futures import http2
+from requests_futures.sessions import FuturesSession
+
+pytest.importorskip('h2')
+pytest.importorskip('httpx')
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import DataReceived, RequestReceived, StreamEnded
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class H2Handler(socketserver.BaseRequestHandler):
+    """Answers each request with JSON describing it, prior knowledge h2c"""
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        conn = H2Connection(
+            config=H2Configuration(client_side=False, header_encoding='utf-8')
+        )
+        conn.initiate_connection()
+        self.request.sendall(conn.data_to_send())
+        requests = {}
+        while True:
+            data = self.request.recv(65535)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    requests[event.stream_id] = (dict(event.headers), [])
+                elif isinstance(event, DataReceived):
+                    requests[event.stream_id][1].append(event.data)
+                    conn.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, StreamEnded):
+                    headers, body = requests.pop(event.stream_id)
+                    self.respond(conn, event.stream_id, headers, body)
+            self.request.sendall(conn.data_to_send())
+
+    def respond(self, conn, stream_id, headers, body):
+        data = json.dumps(
+            {
+                'method': headers[':method'],
+                'path': headers[':path'],
+                'stream_id': stream_id,
+                'body': b''.join(body).decode('utf-8'),
+                'headers': headers,
+            }
+        ).encode('utf-8')
+        conn.send_headers(
+            stream_id,
+            [
+                (':status', '200'),
+                ('content-type', 'application/json'),
+                ('content-length', str(len(data))),
+                ('set-cookie', 'flavor=h2; Path=/'),
+            ],
+        )
+        conn.send_data(stream_id, data, end_stream=True)
+
+
+class H2Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        socketserver.ThreadingTCPServer.__init__(
+            self, ('127.0.0.1', 0), H2Handler
+        )
+        self.connections = 0
+        self.lock = Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+
+class HTTP2AdapterTestCase(TestCase):
+    def setUp(self):
+        self.server = H2Server()
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_multiplexed(self):
+        with FuturesSession(max_workers=16) as session:
+            session.mount('http://', http2.HTTP2Adapter(http1=False))
+            futures = [
+                session.get('{}/get/{}'.format(self.server.url, i))
+                for i in range(50)
+            ]
+            resps = [f.result() for f in futures]
+        for i, resp in enumerate(resps):
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual('HTTP/2', resp.raw.http_version)
+            self.assertEqual('/get/{}'.format(i), resp.json()['path'])
+        # they were all streams on the one connection
+        self.assertEqual(1, self.server.connections)
+        self.assertEqual(50, len({r.json()['stream_id'] for r in resps}))
+
+    def test_request(self):
+        session = FuturesSession()
+        session.mount('http://', http2.HTTP2Adapter(http1=False))
+        resp = session.post(
+            self.server.url + '/post',
+            data='body',
+            headers={'Connection': 'keep-alive', 'X-Test': 'yes'},
+        ).result()
+        data = resp.json()
+        self.assertEqual('POST', data['method'])
+        self.assertEqual('body', data['body'])
+        self.assertEqual('yes', data['headers']['x-test'])
+        # HTTP/2 doesn't allow connection specific headers
+        self.assertNotIn('connection', data['headers'])
+        self.assertEqual('application/json', resp.headers['Content-Type'])
+        self.assertEqual('h2', session.cookies['flavor'])
+        # streamed
+        resp = session.get(self.server.url + '/get', stream=True).result()
+        self.assertEqual(
+            '/get',
+            json.loads(b''.join(resp.iter_content(4)).decode('utf-8'))['path'],
+        )
+        session.close()
+
+    def test_http1(self):
+        # httpbin only speaks HTTP/1.1
+        session = FuturesSession()
+        session.mount('http://', http2.HTTP2Adapter())
+        resp = session.get(self.httpbin.join('get')).result()
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual('HTTP/1.1', resp.raw.http_version)
+        resp = session.get(self.httpbin.join('gzip')).result()
+        self.assertTrue(resp.json()['gzipped'])
+        session.close()
+
+    def test_errors(self):
+        session = FuturesSession()
+        session.mount('http://', http2.HTTP2Adapter())
+        with self.assertRaises(ConnectionError):
+            session.get('http://127.0.0.1:1/').result()
+        session.close()
+
+    def test_pickle(self):
+        adapter = http2.HTTP2Adapter(max_connections=3, http1=False)
+        adapter.client()
+        copy = pickle.loads(pickle.dumps(adapter))
+        self.assertEqual(3, copy.max_connections)
+        self.assertFalse(copy.http1)
+        self.assertEqual({}, copy._clients)
+        adapter.close()
+        self.assertEqual({}, adapter._clients)
+
+    def test_missing(self):
+        with patch.object(http2, 'httpx', None):
+            with self.assertRaises(ImportError):
+                http2.HTTP2Adapter()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for concurrency limits."""
+
+from threading import Thread
+from time import monotonic, sleep, time
+from unittest import TestCase
+
+import pytest
+from requests import Response
+from requests.exceptions import Timeout
+
+from requests_futures.adapters import FuturesHTTPAdapter
+from requests_futures.limits import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    TokenBucket,
+)
+from requests_futures.sessions import FuturesSession
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class AIMDLimiterTestCase(TestCase):
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            AIMDLimiter(initial=0)
+        with self.assertRaises(ValueError):
+            AIMDLimiter(initial=8, max_limit=4)
+        with self.assertRaises(ValueError):
+            AIMDLimiter(initial=2, min_limit=4)
+
+    def test_increase(self):
+        limiter = AIMDLimiter(initial=4, max_limit=6)
+        changes = []
+        limiter.listeners.append(changes.append)
+        # an under-used limit doesn't grow
+        for _ in range(20):
+            limiter.record(0.01, 1, False)
+        self.assertEqual(4, limiter.limit)
+        # about one per limit's worth of successes
+        for _ in range(5):
+            limiter.record(0.01, 4, False)
+        self.assertEqual(5, limiter.limit)
+        for _ in range(100):
+            limiter.record(0.01, 6, False)
+        self.assertEqual(6, limiter.limit)
+        self.assertEqual([5, 6], changes)
+
+    def test_decrease(self):
+        limiter = AIMDLimiter(
+            initial=10, min_limit=2, backoff_ratio=0.5, latency_threshold=1
+        )
+        limiter.record(0.01, 10, True)
+        self.assertEqual(5, limiter.limit)
+        # too slow counts as a failure
+        limiter.record(2, 5, False)
+        self.assertEqual(2, limiter.limit)
+        limiter.record(0.01, 2, True)
+        self.assertEqual(2, limiter.limit)
+
+
+class TokenBucketTestCase(TestCase):
+    def test_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, burst=0)
+
+        bucket = TokenBucket(10, burst=2)
+        now = bucket._updated
+        self.assertEqual(0, bucket.wait(now))
+        bucket.consume(now)
+        bucket.consume(now)
+        self.assertAlmostEqual(0.1, bucket.wait(now))
+        self.assertAlmostEqual(0.05, bucket.wait(now + 0.05))
+        self.assertEqual(0, bucket.wait(now + 0.11))
+        # never more than burst saved up
+        bucket.wait(now + 100)
+        self.assertEqual(2, bucket._tokens)
+
+    def test_pause(self):
+        bucket = TokenBucket(10, burst=5)
+        now = bucket._updated
+        bucket.pause(2, now)
+        self.assertAlmostEqual(2, bucket.wait(now))
+        self.assertEqual(0, bucket.wait(now + 2))
+        # a shorter pause doesn't cut a longer one short
+        bucket.pause(1, now)
+        self.assertAlmostEqual(1, bucket.wait(now + 1))
+        # and it doesn't start out with a burst
+        bucket.consume(now + 2)
+        self.assertAlmostEqual(0.1, bucket.wait(now + 2))
+
+
+class RateLimitTestCase(TestCase):
+    def test_rate_limit(self):
+        url = self.httpbin.join('get')
+        sess = FuturesSession(max_workers=4, rate_limit=20)
+        start = time()
+        for resp in sess.map([url] * 6):
+            self.assertEqual(200, resp.status_code)
+        # the first is free, the rest are spaced out
+        self.assertTrue(time() - start >= 0.25)
+        sess.close()
+
+        other = 'http://127.0.0.1:{}/'.format(self.httpbin.port)
+        sess = FuturesSession(
+            max_workers=4,
+            rate_limit_per_host=TokenBucket(100, burst=10),
+            host_rate_limits={other: 10},
+        )
+        start = time()
+        fast = [sess.get(url) for _ in range(5)]
+        slow = [sess.get(other + 'get') for _ in range(3)]
+        for future in fast:
+            future.result()
+        self.assertFalse(all(future.done() for future in slow))
+        for future in slow:
+            self.assertEqual(200, future.result().status_code)
+        self.assertTrue(time() - start >= 0.2)
+        sess.close()
+
+    def test_close_cancelled(self):
+        url = self.httpbin.join('get')
+        sess = FuturesSession(rate_limit=5)
+        first = sess.get(url)
+        # held back by the rate limit, then cancelled
+        second = sess.get(url)
+        self.assertTrue(second.cancel())
+        first.result()
+        # the timer drops the cancelled request while close is waiting
+        closing = Thread(target=sess.close, daemon=True)
+        closing.start()
+        closing.join(timeout=5)
+        self.assertFalse(closing.is_alive())
+
+    def test_retry_after(self):
+        sess = FuturesSession(max_workers=1, rate_limit=1000)
+        scheduler = sess._scheduler
+        key = scheduler.key(self.httpbin.join('get'))
+        resp = Response()
+        resp.status_code = 429
+        resp.headers['Retry-After'] = '1'
+        scheduler._throttled(key, resp)
+        self.assertTrue(0.9 < scheduler._host_wait(key, monotonic()) <= 1)
+
+        start = time()
+        self.assertEqual(
+            200, sess.get(self.httpbin.join('get')).result().status_code
+        )
+        self.assertTrue(time() - start >= 0.9)
+
+        # without a Retry-After hold off for a token's worth
+        resp.headers.pop('Retry-After')
+        scheduler._throttled(key, resp)
+        self.assertTrue(0 < scheduler._host_wait(key, monotonic()) <= 0.001)
+        # 503s without one aren't about us
+        resp.status_code = 503
+        scheduler._paused.clear()
+        scheduler._throttled(key, resp)
+        self.assertEqual(0, scheduler._host_wait(key, monotonic()))
+        sess.close()
+
+
+class DeadlineTestCase(TestCase):
+    def test_deadline(self):
+        deadline = Deadline(10)
+        now = monotonic()
+        self.assertTrue(9 < deadline.remaining(now) <= 10)
+        self.assertEqual(0, deadline.remaining(now + 11))
+        self.assertFalse(deadline.expired)
+        self.assertTrue(Deadline(0).expired)
+        self.assertTrue(issubclass(DeadlineExceeded, Timeout))
+
+    def test_session(self):
+        sess = FuturesSession(max_workers=1)
+        # expired before it's even submitted
+        with self.assertRaises(DeadlineExceeded):
+            sess.get(self.httpbin.join('get'), deadline=0).result()
+
+        # expires while it waits behind the first
+        slow = sess.get(self.httpbin.join('delay/0.3'))
+        queued = sess.get(self.httpbin.join('get'), deadline=0.1)
+        self.assertEqual(200, slow.result().status_code)
+        with self.assertRaises(DeadlineExceeded):
+            queued.result()
+
+        # the read timeout is cut down to what's left
+        start = time()
+        with self.assertRaises(Timeout):
+            sess.get(
+                self.httpbin.join('delay/0.5'), timeout=10, deadline=0.2
+            ).result()
+        self.assertTrue(time() - start < 0.45)
+        sleep(0.4)
+
+        # a deadline for the whole batch
+        urls = [self.httpbin.join('delay/0.3')] + [self.httpbin.join('get')] * 2
+        results = list(sess.map(urls, return_exceptions=True, deadline=0.15))
+        self.assertIsInstance(results[0], Timeout)
+        self.assertIsInstance(results[1], DeadlineExceeded)
+        self.assertIsInstance(results[2], DeadlineExceeded)
+        sleep(0.2)
+
+        # retries stop at the deadline
+        retrying = FuturesSession(max_workers=1, retries=10)
+        start = time()
+        with self.assertRaises(Timeout):
+            retrying.get(self.httpbin.join('delay/0.3'), deadline=0.2).result()
+        self.assertTrue(time() - start < 0.3)
+        retrying.close()
+        sleep(0.2)
+        sess.close()
+
+    def test_rate_limited(self):
+        sess = FuturesSession(max_workers=2, rate_limit=2)
+        url = self.httpbin.join('get')
+        first = sess.get(url)
+        # held back by the rate limit past its deadline, then dropped
+        held = sess.get(url, deadline=0.1)
+        self.assertEqual(200, first.result().status_code)
+        with self.assertRaises(DeadlineExceeded):
+            held.result()
+        # it didn't use up the token
+        start = time()
+        self.assertEqual(200, sess.get(url).result().status_code)
+        self.assertTrue(time() - start < 0.4)
+        sess.close()
+
+
+class CircuitBreakerTestCase(TestCase):
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+        with self.assertRaises(ValueError):
+            CircuitBreaker(half_open_probes=0)
+
+    def test_states(self):
+        breaker = CircuitBreaker(
+            failure_threshold=3, recovery_timeout=10, half_open_probes=2
+        )
+        changes = []
+        breaker.listeners.append(lambda *args: changes.append(args))
+        key = 'http://a'
+
+        # successes reset the count
+        for failed in (True, True, False, True, True):
+            self.assertEqual('closed', breaker.allow(key, now=0))
+            breaker.record(key, 'closed', failed, now=0)
+        self.assertEqual('closed', breaker.state(key, now=0))
+        # no verdict doesn't either
+        breaker.record(key, 'closed', None, now=0)
+        breaker.record(key, 'closed', True, now=1)
+        self.assertEqual('open', breaker.state(key, now=1))
+        self.assertEqual({key: 'open'}, breaker.states(now=1))
+        self.assertFalse(breaker.allow(key, now=10))
+        # other hosts are unaffected
+        self.assertEqual('closed', breaker.allow('http://b', now=1))
+
+        # half-open lets probes through a few at a time
+        self.assertEqual('half_open', breaker.allow(key, now=11))
+        self.assertEqual('half_open', breaker.allow(key, now=11))
+        self.assertFalse(breaker.allow(key, now=11))
+        # a request from before it opened doesn't count
+        breaker.record(key, 'closed', False, now=11)
+        breaker.record(key, 'half_open', False, now=11)
+        self.assertEqual('half_open', breaker.state(key, now=11))
+        # any probe failing re-opens it
+        breaker.record(key, 'half_open', True, now=12)
+        self.assertEqual('open', breaker.state(key, now=12))
+        self.assertFalse(breaker.allow(key, now=21))
+
+        # enough successful probes close it
+        for _ in range(2):
+            self.assertEqual('half_open', breaker.allow(key, now=22))
+            breaker.record(key, 'half_open', False, now=22)
+        self.assertEqual('closed', breaker.state(key, now=22))
+        self.assertEqual({}, breaker.states(now=22))
+        self.assertEqual(
+            [(key, 'open'), (key, 'open'), (key, 'closed')], changes
+        )
+
+        breaker.record(key, 'closed', True, now=23)
+        breaker.reset()
+        self.assertEqual({}, breaker._circuits)
+
+    def test_session(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+        sess = FuturesSession(max_workers=1, circuit_breaker=breaker)
+        down = 'http://127.0.0.1:1/'
+        for _ in range(2):
+            with self.assertRaises(Exception) as cm:
+                sess.get(down).result()
+            self.assertNotIsInstance(cm.exception, CircuitOpenError)
+        self.assertEqual(
+            {'http://127.0.0.1:1': 'open'}, sess.metrics()['circuits']
+        )
+
+        # fails straight away without a worker
+        future = sess.get(down)
+        self.assertTrue(future.done())
+        with self.assertRaises(CircuitOpenError):
+            future.result()
+        self.assertEqual(0, sess.pending)
+
+        # 5xxs count as failures, 4xxs don't
+        url = self.httpbin.join('status/')
+        for _ in range(3):
+            self.assertEqual(404, sess.get(url + '404').result().status_code)
+        self.assertEqual(500, sess.get(url + '500').result().status_code)
+        self.assertEqual(500, sess.get(url + '500').result().status_code)
+        with self.assertRaises(CircuitOpenError):
+            sess.get(url + '200').result()
+
+        # until it's time to probe
+        sleep(0.2)
+        self.assertEqual(200, sess.get(url + '200').result().status_code)
+        self.assertEqual(
+            {'http://127.0.0.1:1': 'half_open'}, sess.metrics()['circuits']
+        )
+        sess.close()
+
+        # expired deadlines say nothing about the host
+        sess = FuturesSession(max_workers=1, circuit_breaker=breaker)
+        url = self.httpbin.join('get')
+        for _ in range(3):
+            with self.assertRaises(DeadlineExceeded):
+                sess.get(url, deadline=0).result()
+        self.assertEqual(200, sess.get(url).result().status_code)
+        sess.close()
+
+        self.assertIsInstance(
+            FuturesSession(circuit_breaker=True).circuit_breaker, CircuitBreaker
+        )
+
+
+class ResizeTestCase(TestCase):
+    def test_adapter_resize(self):
+        adapter = FuturesHTTPAdapter(pool_maxsize=2)
+        sess = FuturesSession()
+        sess.mount('http://', adapter)
+        sess.get(self.httpbin.join('get')).result()
+        key = 'http://{}:{}'.format(self.httpbin.host, self.httpbin.port)
+        self.assertEqual(2, adapter.pool_stats()[key]['maxsize'])
+
+        adapter.resize(5)
+        stats = adapter.pool_stats()[key]
+        self.assertEqual(5, stats['maxsize'])
+        # the existing connection survives
+        self.assertEqual(1, stats['idle'])
+        self.assertEqual(0, stats['in_use'])
+        sess.get(self.httpbin.join('get')).result()
+        self.assertEqual(1, adapter.pool_stats()[key]['idle'])
+
+        adapter.resize(1)
+        self.assertEqual(1, adapter.pool_stats()[key]['maxsize'])
+        # new pools pick up the size too
+        sess.get('http://127.0.0.1:{}/get'.format(self.httpbin.port)).result()
+        for stats in adapter.pool_stats().values():
+            self.assertEqual(1, stats['maxsize'])
+        sess.close()
+
+    def test_session_limiter(self):
+        limiter = AIMDLimiter(initial=2, max_limit=16)
+        sess = FuturesSession(max_workers=2, limiter=limiter)
+        # the owned executor is sized for the largest limit
+        self.assertEqual(16, sess.executor._max_workers)
+        self.assertEqual(2, sess.metrics()['limit'])
+        self.assertEqual(2, sess.get_adapter('http://')._pool_maxsize)
+
+        for resp in sess.map([self.httpbin.join('get')] * 20):
+            self.assertEqual(200, resp.status_code)
+        self.assertTrue(limiter.limit > 2)
+        self.assertEqual(
+            limiter.limit, sess.get_adapter('http://')._pool_maxsize
+        )
+
+        before = limiter.limit
+        for resp in sess.map([self.httpbin.join('status/503')] * 4):
+            self.assertEqual(503, resp.status_code)
+        self.assertTrue(limiter.limit < before)
+        self.assertEqual(0, sess.metrics()['active'])
+        sess.close()
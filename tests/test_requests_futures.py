@@ -3,6 +3,7 @@
 
 """Tests for Requests."""
 
+import asyncio
 from concurrent.futures import Future, ProcessPoolExecutor
 from os import environ
 from sys import version_info
@@ -12,13 +13,17 @@ try:
 except ImportError:
     pypy_version_info = None
 import logging
-from unittest import TestCase, main, skipIf
+from unittest import IsolatedAsyncioTestCase, TestCase, main, skipIf
 
 import pytest
 from requests import Response, session
 from requests.adapters import DEFAULT_POOLSIZE
 
-from requests_futures.sessions import FuturesSession
+from requests_futures.sessions import (
+    AsyncFuturesSession,
+    FuturesSession,
+    SaturatedError,
+)
 
 HTTPBIN = environ.get('HTTPBIN_URL', 'https://nghttp2.org/httpbin/')
 logging.basicConfig(level=logging.DEBUG)
@@ -96,6 +101,472 @@ class RequestsTestCase(TestCase):
         )
         self.assertEqual(session.executor._max_workers, 10)
 
+    def test_max_pending(self):
+        """Tests the `max_pending` backpressure limit."""
+        from concurrent.futures import ThreadPoolExecutor
+        from threading import Event
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        blocked = Event()
+        executor.submit(blocked.wait)
+        sess = FuturesSession(
+            executor=executor, max_pending=1, pending_timeout=0
+        )
+        future = sess.get(self.httpbin.join('get'))
+        self.assertEqual(1, sess.pending)
+        with self.assertRaises(SaturatedError):
+            sess.get(self.httpbin.join('get'))
+        sess.pending_timeout = 0.05
+        with self.assertRaises(SaturatedError):
+            sess.get(self.httpbin.join('get'))
+
+        blocked.set()
+        self.assertEqual(200, future.result().status_code)
+        # a slot frees up once the first request is done
+        sess.pending_timeout = 5
+        self.assertEqual(
+            200, sess.get(self.httpbin.join('get')).result().status_code
+        )
+        executor.shutdown()
+
+    def test_close_cancel_futures(self):
+        """Tests closing without waiting for queued requests."""
+        from concurrent.futures import ThreadPoolExecutor
+        from threading import Event
+
+        # an executor the session doesn't own
+        executor = ThreadPoolExecutor(max_workers=1)
+        blocked = Event()
+        executor.submit(blocked.wait)
+        sess = FuturesSession(executor=executor)
+        queued = sess.get(self.httpbin.join('get'))
+        sess.close(cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        blocked.set()
+        executor.shutdown()
+
+    def test_close_abort(self):
+        """Tests closing with in flight requests aborted."""
+        from time import monotonic, sleep
+
+        from requests.exceptions import ConnectionError
+
+        sess = FuturesSession(max_workers=1, retries=3)
+        running = sess.get(self.httpbin.join('delay/1'))
+        queued = sess.get(self.httpbin.join('get'))
+        # give it time to connect
+        sleep(0.2)
+        start = monotonic()
+        sess.close(abort=True)
+        self.assertTrue(monotonic() - start < 0.5)
+        self.assertTrue(queued.cancelled())
+        self.assertTrue(running.cancelled())
+        # wait out the server so it's free for the next test
+        sleep(0.8)
+
+        sess = FuturesSession(max_workers=1)
+        running = sess.get(self.httpbin.join('delay/1'))
+        sleep(0.2)
+        sess.close(abort=True)
+        with self.assertRaises(ConnectionError):
+            running.result(timeout=0)
+        sleep(0.8)
+
+    def test_host_limits(self):
+        """Tests per-host concurrency limits."""
+        from concurrent.futures import wait
+        from time import time
+
+        slow = self.httpbin.join('delay/')
+        sess = FuturesSession(
+            max_workers=4, max_per_host=3, host_limits={slow: 1}
+        )
+        self.assertEqual(3, sess.get_adapter('http://')._pool_maxsize)
+        self.assertEqual(1, sess.get_adapter(slow)._pool_maxsize)
+
+        start = time()
+        slow_futures = [sess.get(slow + '0.2') for _ in range(3)]
+        fast_futures = [sess.get(self.httpbin.join('get')) for _ in range(6)]
+        wait(fast_futures)
+        # fast requests aren't stuck behind the slow ones
+        self.assertFalse(all(f.done() for f in slow_futures))
+        wait(slow_futures)
+        # and the slow ones ran one at a time
+        self.assertTrue(time() - start >= 0.6)
+        for future in slow_futures + fast_futures:
+            self.assertEqual(200, future.result().status_code)
+
+        queued = sess.get(slow + '0.2')
+        cancelled = sess.get(slow + '0.2')
+        self.assertTrue(cancelled.cancel())
+        sess.close()
+        self.assertEqual(200, queued.result().status_code)
+        self.assertEqual(0, sess.pending)
+
+    def test_priorities(self):
+        """Tests per-request priorities."""
+        from threading import Event
+
+        from requests_futures.executors import PriorityThreadPoolExecutor
+
+        url = self.httpbin.join('get')
+        for kwargs in ({}, {'max_per_host': 1}):
+            sess = FuturesSession(max_workers=1, priorities=True, **kwargs)
+            self.assertIsInstance(sess.executor, PriorityThreadPoolExecutor)
+            order = []
+
+            def hook(resp, *args, **kwargs):
+                order.append(int(resp.json()['args']['p']))
+
+            blocked = Event()
+            if kwargs:
+                sess.get(
+                    url, hooks={'response': lambda *a, **k: blocked.wait()}
+                )
+            else:
+                sess.executor.submit(blocked.wait)
+            futures = [
+                sess.get(
+                    url, params={'p': p}, priority=p, hooks={'response': hook}
+                )
+                for p in (0, -1, 5, 0)
+            ]
+            futures[3].cancel()
+            blocked.set()
+            for future in futures[:3]:
+                self.assertEqual(200, future.result().status_code)
+            self.assertEqual([5, 0, -1], order)
+            sess.close()
+
+        with self.assertRaises(ValueError):
+            FuturesSession(priorities=True, use_processes=True)
+
+    def test_thread_local_sessions(self):
+        """Tests per-thread sessions cloned from the template."""
+        from threading import Barrier, current_thread
+
+        from requests.adapters import BaseAdapter, HTTPAdapter
+
+        from requests_futures.adapters import FuturesHTTPAdapter
+
+        sess = FuturesSession(max_workers=2, thread_local_sessions=True)
+        sess.headers['Foo'] = 'bar'
+        sess.cookies.set('a', 'b')
+        barrier = Barrier(2)
+        seen = {}
+
+        def hook(resp, *args, **kwargs):
+            seen[current_thread().name] = resp.connection
+            # make sure both workers get a request
+            barrier.wait(timeout=5)
+
+        futures = [
+            sess.get(self.httpbin.join('cookies'), hooks={'response': hook})
+            for _ in range(2)
+        ]
+        for future in futures:
+            self.assertEqual({'a': 'b'}, future.result().json()['cookies'])
+        self.assertEqual(2, len(seen))
+        adapters = list(seen.values())
+        template = sess.get_adapter('http://')
+        self.assertIsNot(adapters[0], adapters[1])
+        for adapter in adapters:
+            self.assertIsInstance(adapter, FuturesHTTPAdapter)
+            self.assertIsNot(template, adapter)
+            self.assertIsNot(template.poolmanager, adapter.poolmanager)
+        # the pools they use show up in the metrics
+        key = 'http://{}:{}'.format(self.httpbin.host, self.httpbin.port)
+        self.assertEqual(2, sess.metrics()['pools'][key]['idle'])
+
+        # settings are read from the template as they change
+        sess.headers['Foo'] = 'baz'
+        resp = sess.get(self.httpbin.join('headers')).result()
+        self.assertEqual('baz', resp.json()['headers']['Foo'])
+        self.assertIs(sess.get_adapter('http://'), template)
+
+        # mounting has them start over
+        sess.mount('http://', FuturesHTTPAdapter(pool_maxsize=3))
+        resp = sess.get(self.httpbin.join('get')).result()
+        self.assertEqual(3, resp.connection._pool_maxsize)
+        self.assertNotIn(resp.connection, adapters)
+
+        # adapters that can't be cloned are shared, and left open
+        class SharedAdapter(BaseAdapter):
+            closed = False
+
+            def send(self, request, **kwargs):
+                if self.closed:
+                    raise RuntimeError('adapter used after close')
+                return HTTPAdapter().send(request, **kwargs)
+
+            def close(self):
+                self.closed = True
+
+        sess.close()
+        sess = FuturesSession(max_workers=1, thread_local_sessions=True)
+        shared = SharedAdapter()
+        sess.mount('http://', shared)
+        self.assertEqual(
+            200, sess.get(self.httpbin.join('get')).result().status_code
+        )
+        sess.refresh_sessions()
+        self.assertEqual(
+            200, sess.get(self.httpbin.join('get')).result().status_code
+        )
+        self.assertFalse(shared.closed)
+        sess.close()
+
+        with self.assertRaises(ValueError):
+            FuturesSession(thread_local_sessions=True, use_processes=True)
+
+    def test_coalesce(self):
+        """Tests single-flight coalescing of identical requests."""
+        from concurrent.futures import ThreadPoolExecutor
+        from threading import Event
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        blocked = Event()
+        executor.submit(blocked.wait)
+        sess = FuturesSession(executor=executor, coalesce=True)
+        url = self.httpbin.join('get')
+        futures = [sess.get(url, params={'a': 1}) for _ in range(3)]
+        self.assertEqual(1, sess.pending)
+        # different params, a body, and non-idempotent methods aren't shared
+        others = [
+            sess.get(url, params={'a': 2}),
+            sess.request('GET', url, data='x'),
+            sess.post(self.httpbin.join('post')),
+        ]
+        self.assertEqual(4, sess.pending)
+        blocked.set()
+
+        resps = [f.result() for f in futures]
+        self.assertEqual(3, len(set(id(r) for r in resps)))
+        self.assertEqual(3, len(set(id(r.headers) for r in resps)))
+        for resp in resps:
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual({'a': '1'}, resp.json()['args'])
+        for future in others:
+            self.assertEqual(200, future.result().status_code)
+        self.assertEqual({}, sess._in_flight)
+
+        # once the first is done the next one makes its own request
+        resp = sess.get(url, params={'a': 1}).result()
+        self.assertIsNot(resps[0], resp)
+        executor.shutdown()
+
+    def test_retries(self):
+        """Tests session level retries."""
+        from time import time
+
+        from requests.exceptions import ConnectionError, RetryError
+        from urllib3.util.retry import Retry
+
+        sess = FuturesSession(max_workers=1)
+        submitted = []
+        submit = sess._dispatch
+
+        def counting_submit(*args, **kwargs):
+            submitted.append(args[2])
+            return submit(*args, **kwargs)
+
+        sess._dispatch = counting_submit
+        sess.retries = Retry(
+            total=2, backoff_factor=0.2, status_forcelist=[503]
+        )
+        start = time()
+        future = sess.get(self.httpbin.join('status/503'))
+        # the worker is free to do other things during the backoff
+        other = sess.get(self.httpbin.join('get'))
+        with self.assertRaises(RetryError):
+            future.result()
+        self.assertTrue(time() - start >= 0.4)
+        self.assertTrue(other.done())
+        self.assertEqual(4, len(submitted))
+
+        del submitted[:]
+        sess.retries = Retry(
+            total=1, status_forcelist=[503], raise_on_status=False
+        )
+        self.assertEqual(
+            503, sess.get(self.httpbin.join('status/503')).result().status_code
+        )
+        self.assertEqual(2, len(submitted))
+
+        # non-retryable statuses and methods are returned straight away
+        del submitted[:]
+        self.assertEqual(
+            404, sess.get(self.httpbin.join('status/404')).result().status_code
+        )
+        self.assertEqual(
+            503, sess.post(self.httpbin.join('status/503')).result().status_code
+        )
+        self.assertEqual(2, len(submitted))
+
+        del submitted[:]
+        sess.retries = Retry.from_int(2)
+        with self.assertRaises(ConnectionError):
+            sess.get('http://127.0.0.1:1/').result()
+        self.assertEqual(3, len(submitted))
+        sess.close()
+
+        # streamed responses that are retried give their connection back
+        sess = FuturesSession(
+            max_workers=1,
+            retries=Retry(
+                total=1, status_forcelist=[503], raise_on_status=False
+            ),
+            adapter_kwargs={'pool_maxsize': 1, 'pool_block': True},
+        )
+        resp = sess.get(self.httpbin.join('status/503'), stream=True).result(
+            timeout=5
+        )
+        self.assertEqual(503, resp.status_code)
+        resp.close()
+        sess.retries = Retry(total=1, status_forcelist=[503])
+        future = sess.get(self.httpbin.join('status/503'), stream=True)
+        with self.assertRaises(RetryError):
+            future.result(timeout=5)
+        stats = sess.adapters['http://'].pool_stats()
+        self.assertEqual(1, sum(s['idle'] for s in stats.values()))
+        sess.close()
+
+    def test_hedging(self):
+        """Tests hedged requests."""
+        from threading import Lock
+        from time import sleep, time
+
+        from requests.adapters import HTTPAdapter
+
+        class SlowFirstAdapter(HTTPAdapter):
+            sent = 0
+            lock = Lock()
+
+            def send(self, *args, **kwargs):
+                with self.lock:
+                    SlowFirstAdapter.sent += 1
+                    first = SlowFirstAdapter.sent == 1
+                if first:
+                    sleep(1)
+                return super(SlowFirstAdapter, self).send(*args, **kwargs)
+
+        sess = FuturesSession(hedge_after=0.1)
+        sess.mount('http://', SlowFirstAdapter())
+        start = time()
+        resp = sess.get(self.httpbin.join('get')).result()
+        self.assertEqual(200, resp.status_code)
+        self.assertTrue(time() - start < 0.9)
+        self.assertEqual(2, SlowFirstAdapter.sent)
+
+        # non-idempotent requests are never hedged
+        self.assertEqual(
+            200, sess.post(self.httpbin.join('post')).result().status_code
+        )
+        self.assertEqual(3, SlowFirstAdapter.sent)
+
+        sess = FuturesSession(hedge_after=0.05, hedge_percentile=50)
+        self.assertEqual(0.05, sess._hedge_delay())
+        sess._latencies.extend(i / 100.0 for i in range(1, 21))
+        self.assertEqual(0.11, sess._hedge_delay())
+        sess.hedge_after = 0.5
+        self.assertEqual(0.5, sess._hedge_delay())
+
+    def test_attempts_pending(self):
+        """Tests retries and hedges with `max_pending`."""
+        from concurrent.futures import CancelledError, ThreadPoolExecutor
+        from threading import Event
+
+        from requests.exceptions import RetryError
+        from urllib3.util.retry import Retry
+
+        # the retry keeps its slot rather than waiting for one on the timer,
+        # which the rate limit needs to let the others go
+        sess = FuturesSession(
+            max_pending=2,
+            rate_limit=2,
+            retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[500]),
+        )
+        future = sess.get(self.httpbin.join('status/500'))
+        others = [sess.get(self.httpbin.join('get')) for _ in range(2)]
+        self.assertEqual(
+            [200, 200], [f.result(timeout=5).status_code for f in others]
+        )
+        with self.assertRaises(RetryError):
+            future.result(timeout=5)
+        sess.close()
+
+        # a hedge that can't get a slot just doesn't happen
+        sess = FuturesSession(
+            max_pending=1, pending_timeout=0, hedge_after=0.05
+        )
+        resp = sess.get(self.httpbin.join('delay/0.3')).result(timeout=5)
+        self.assertEqual(200, resp.status_code)
+        sess.close()
+
+        # an attempt cancelled by the executor cancels the request
+        executor = ThreadPoolExecutor(max_workers=1)
+        blocked = Event()
+        executor.submit(blocked.wait)
+        sess = FuturesSession(executor=executor, max_pending=1, retries=2)
+        future = sess.get(self.httpbin.join('get'))
+        executor.shutdown(wait=False, cancel_futures=True)
+        with self.assertRaises(CancelledError):
+            future.result(timeout=2)
+        self.assertEqual(0, sess.pending)
+        blocked.set()
+        sess.close()
+
+    def test_metrics(self):
+        """Tests request timings, metrics hooks, and gauges."""
+        from pickle import dumps, loads
+        from threading import Event
+
+        from requests_futures.adapters import FuturesHTTPAdapter
+
+        reported = []
+        sess = FuturesSession(max_workers=1, metrics_hooks=[reported.append])
+        self.assertIsInstance(sess.get_adapter('http://'), FuturesHTTPAdapter)
+        blocked = Event()
+        sess.executor.submit(blocked.wait)
+        future = sess.get(self.httpbin.join('get'))
+        metrics = sess.metrics()
+        self.assertEqual(1, metrics['pending'])
+        self.assertEqual(1, metrics['queued'])
+        self.assertEqual(0, metrics['active'])
+        self.assertEqual(1, metrics['max_workers'])
+        blocked.set()
+
+        resp = future.result()
+        timings = resp.timings
+        self.assertEqual('GET', timings.method)
+        self.assertEqual(200, timings.status_code)
+        self.assertTrue(timings.queued > 0)
+        self.assertTrue(timings.connect > 0)
+        self.assertTrue(timings.pool_wait >= 0)
+        self.assertTrue(timings.ttfb >= timings.connect)
+        self.assertTrue(timings.read >= 0)
+        self.assertTrue(timings.total >= timings.queued + timings.ttfb)
+        self.assertEqual(timings.total, timings.as_dict()['total'])
+        # they survive pickling, e.g. coming back from a process worker
+        self.assertEqual(timings.ttfb, loads(dumps(resp)).timings.ttfb)
+        self.assertNotIn('__attrs__', vars(resp))
+
+        with self.assertRaises(Exception):
+            sess.get('http://127.0.0.1:1/').result()
+
+        pools = sess.metrics()['pools']
+        key = 'http://{}:{}'.format(self.httpbin.host, self.httpbin.port)
+        self.assertEqual(1, pools[key]['idle'])
+        self.assertEqual(0, pools[key]['in_use'])
+        self.assertEqual(DEFAULT_POOLSIZE, pools[key]['maxsize'])
+
+        # hooks are run once the requests' futures have been resolved
+        sess.close()
+        self.assertEqual(2, len(reported))
+        self.assertIs(timings, reported[0])
+        self.assertIsNotNone(reported[1].exception)
+        self.assertIsNone(reported[1].ttfb)
+
     def test_adapter_kwargs(self):
         """Tests the `adapter_kwargs` shortcut."""
         from concurrent.futures import ThreadPoolExecutor
@@ -116,6 +587,47 @@ class RequestsTestCase(TestCase):
         )
         self.assertEqual(session.get_adapter('http://')._pool_connections, 20)
 
+    def test_map(self):
+        """Tests bounded, ordered and unordered bulk requests."""
+        sess = FuturesSession(max_workers=4)
+        in_flight = []
+        request = sess.request
+
+        def counting_request(*args, **kwargs):
+            in_flight.append(sum(1 for f in futures if not f.done()))
+            future = request(*args, **kwargs)
+            futures.append(future)
+            return future
+
+        futures = []
+        sess.request = counting_request
+        urls = (self.httpbin.join('get?i={}'.format(i)) for i in range(10))
+        resps = list(sess.map(urls, max_in_flight=2))
+        self.assertEqual(
+            [str(i) for i in range(10)], [r.json()['args']['i'] for r in resps]
+        )
+        self.assertTrue(max(in_flight) < 2)
+
+        specs = [
+            self.httpbin.join('get'),
+            {'url': self.httpbin.join('post'), 'method': 'POST', 'data': 'x'},
+            ('PUT', self.httpbin.join('put'), {'data': 'y'}),
+        ]
+        resps = list(sess.imap_unordered(specs))
+        self.assertEqual(
+            ['GET', 'POST', 'PUT'], sorted(r.request.method for r in resps)
+        )
+
+        specs = [self.httpbin.join('get'), 'http://']
+        with self.assertRaises(Exception):
+            list(sess.map(specs))
+        results = list(sess.map(specs, return_exceptions=True))
+        self.assertEqual(200, results[0].status_code)
+        self.assertIsInstance(results[1], Exception)
+
+        with self.assertRaises(ValueError):
+            list(sess.map(specs, max_in_flight=0))
+
     def test_redirect(self):
         """Tests for the ability to cleanly handle redirects."""
         sess = FuturesSession()
@@ -153,6 +665,51 @@ class RequestsTestCase(TestCase):
         self.assertTrue(passout._exit_called)
 
 
+class AsyncRequestsTestCase(IsolatedAsyncioTestCase):
+    async def test_async_futures_session(self):
+        async with AsyncFuturesSession() as sess:
+            resp = await sess.get(self.httpbin.join('get'))
+            self.assertIsInstance(resp, Response)
+            self.assertEqual(200, resp.status_code)
+
+            resp = await sess.get(self.httpbin.join('status/404'))
+            self.assertEqual(404, resp.status_code)
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await sess.get(
+                    self.httpbin.join('delay/0.5'), await_timeout=0.1
+                )
+
+    async def test_async_map(self):
+        sess = AsyncFuturesSession(max_workers=2)
+
+        async def urls():
+            for i in range(5):
+                yield self.httpbin.join('get?i={}'.format(i))
+
+        resps = [r async for r in sess.map(urls(), max_in_flight=2)]
+        self.assertEqual(
+            [str(i) for i in range(5)], [r.json()['args']['i'] for r in resps]
+        )
+
+        specs = [self.httpbin.join('get'), 'http://']
+        results = [
+            r async for r in sess.imap_unordered(specs, return_exceptions=True)
+        ]
+        self.assertEqual(2, len(results))
+        self.assertEqual(1, sum(1 for r in results if isinstance(r, Exception)))
+        await sess.aclose()
+
+    async def test_aclose_cancels(self):
+        sess = AsyncFuturesSession(max_workers=1)
+        running = sess.get(self.httpbin.join('delay/0.2'))
+        queued = sess.get(self.httpbin.join('get'))
+        await asyncio.sleep(0.05)
+        await sess.aclose(cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        self.assertEqual(200, (await running).status_code)
+
+
 # << test process pool executor >>
 # see discussion https://github.com/ross/requests-futures/issues/11
 def global_cb_modify_response(s, r):
@@ -174,6 +731,25 @@ def global_rasing_cb(s, r):
     raise Exception('boom')
 
 
+def global_cb_worker_identity(s, r):
+    """identify the process and session that ran the request"""
+    from os import getpid
+
+    return getpid(), id(s), r.json()['headers'].get('Foo')
+
+
+def global_process_body(content):
+    """parse a body in a processor, noting where that happened"""
+    from json import loads
+    from os import getpid
+
+    return getpid(), loads(content.decode('utf-8'))['args']
+
+
+def global_raising_process(content):
+    raise ValueError('bad body')
+
+
 # pickling instance method supported only from here
 unsupported_platform = version_info < (3, 4) and not pypy_version_info
 session_required = version_info < (3, 5) and not pypy_version_info
@@ -255,6 +831,118 @@ class RequestsProcessPoolTestCase(TestCase):
         resp = future.result()
         self.assertEqual(404, resp.status_code)
 
+    def test_use_processes(self):
+        self.session.headers['Foo'] = 'bar'
+        for template in (None, self.session):
+            sess = FuturesSession(
+                max_workers=1, use_processes=True, session=template
+            )
+            self.assertIsInstance(sess.executor, ProcessPoolExecutor)
+            sess.headers['Foo'] = 'bar'
+            resp = sess.get(self.httpbin.join('get')).result()
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual('bar', resp.json()['headers']['Foo'])
+            # timings make it back from the worker
+            self.assertTrue(resp.timings.ttfb > 0)
+
+            # the one worker keeps using the same session
+            identities = set(
+                sess.get(
+                    self.httpbin.join('get'),
+                    background_callback=global_cb_worker_identity,
+                ).result()
+                for _ in range(3)
+            )
+            self.assertEqual(1, len(identities))
+            self.assertEqual('bar', identities.pop()[2])
+
+            future = sess.get(
+                self.httpbin.join('get'), background_callback=global_rasing_cb
+            )
+            with self.assertRaises(Exception) as cm:
+                future.result()
+            self.assertEqual('boom', cm.exception.args[0])
+            sess.close()
+
+    def test_process(self):
+        from os import getpid
+        from threading import Event
+
+        sess = FuturesSession(
+            max_workers=1, process_executor=self.proc_executor
+        )
+        future = sess.get(
+            self.httpbin.join('get'),
+            params={'a': 'b'},
+            process=global_process_body,
+        )
+        pid, args = future.result()
+        self.assertNotEqual(getpid(), pid)
+        self.assertEqual({'a': 'b'}, args)
+
+        future = sess.get(
+            self.httpbin.join('get'), process=global_raising_process
+        )
+        with self.assertRaises(ValueError):
+            future.result()
+        # request failures come straight through
+        future = sess.get('http://127.0.0.1:1/', process=global_process_body)
+        with self.assertRaises(Exception):
+            future.result()
+
+        # cancelling before the request has started cancels it
+        blocked = Event()
+        sess.executor.submit(blocked.wait)
+        future = sess.get(self.httpbin.join('get'), process=global_process_body)
+        self.assertTrue(future.cancel())
+        blocked.set()
+        sess.close()
+        self.assertEqual(0, sess.pending)
+        # it wasn't ours to shut down
+        self.proc_executor.submit(getpid).result()
+
+        # one is created when needed and cleaned up
+        sess = FuturesSession(max_workers=1)
+        self.assertEqual(
+            {},
+            sess.get(
+                self.httpbin.join('get'), process=global_process_body
+            ).result()[1],
+        )
+        self.assertIsInstance(sess.process_executor, ProcessPoolExecutor)
+        sess.close()
+        with self.assertRaises(RuntimeError):
+            sess.process_executor.submit(getpid)
+
+    def test_pickle_check_cached(self):
+        import gc
+
+        sess = FuturesSession(use_processes=True, max_workers=1)
+
+        def local_cb(s, r):
+            pass
+
+        with self.assertRaises(RuntimeError):
+            sess.get(self.httpbin.join('get'), background_callback=local_cb)
+        self.assertEqual({local_cb: False}, dict(sess._picklable))
+        with self.assertRaises(RuntimeError):
+            sess.get(self.httpbin.join('get'), background_callback=local_cb)
+        # per-request callbacks aren't kept around once they're done with
+        del local_cb
+        gc.collect()
+        self.assertEqual(0, len(sess._picklable))
+        sess.get(self.httpbin.join('get')).result()
+        self.assertTrue(sess._picklable_without)
+        sess.close()
+
+        # with an executor of ours the session's pickled too, and it changes
+        sess = FuturesSession(executor=self.proc_executor)
+        sess.get(self.httpbin.join('get')).result()
+        sess.hooks['response'].append(lambda r, *args, **kwargs: r)
+        with self.assertRaises(RuntimeError):
+            sess.get(self.httpbin.join('get'))
+        self.assertIsNone(sess._picklable_without)
+
     @skipIf(session_required, 'not supported in python < 3.5')
     def test_context(self):
         self._assert_context()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for sharing executors and adapters between sessions."""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import pytest
+
+from requests_futures.executors import PriorityThreadPoolExecutor
+from requests_futures.sessions import FuturesSession
+from requests_futures.shared import SharedRegistry, SharedResources, registry
+
+
+@pytest.fixture(scope="class", autouse=True)
+def httpbin_on_class(request, httpbin):
+    request.cls.httpbin = httpbin
+
+
+class SharedRegistryTestCase(TestCase):
+    def test_refcount(self):
+        shared = SharedRegistry()
+        created = []
+
+        def factory():
+            created.append(SharedResources(ThreadPoolExecutor(1)))
+            return created[-1]
+
+        first = shared.acquire('a', factory)
+        self.assertIs(first, shared.acquire('a', factory))
+        self.assertEqual(1, len(created))
+        self.assertEqual(2, shared.users('a'))
+        self.assertIn('a', shared)
+
+        shared.release('a')
+        self.assertFalse(first.executor._shutdown)
+        shared.release('a')
+        self.assertTrue(first.executor._shutdown)
+        self.assertNotIn('a', shared)
+        self.assertEqual(0, shared.users('a'))
+
+        # it's created afresh next time
+        self.assertIsNot(first, shared.acquire('a', factory))
+        shared.release('a')
+
+
+class SharedSessionTestCase(TestCase):
+    def test_shared(self):
+        url = self.httpbin.join('get')
+        first = FuturesSession(shared='test', max_workers=4)
+        # sizing comes from the first session
+        second = FuturesSession(shared='test', max_workers=16, priorities=True)
+        other = FuturesSession(shared='other', priorities=True)
+        self.assertEqual(2, registry.users('test'))
+        self.assertIs(first.executor, second.executor)
+        self.assertEqual(4, first.executor._max_workers)
+        self.assertIs(first.adapters['http://'], second.adapters['http://'])
+        self.assertIsNot(first.executor, other.executor)
+        self.assertIsInstance(other.executor, PriorityThreadPoolExecutor)
+
+        # workers only start once there's work
+        self.assertEqual(0, len(first.executor._threads))
+        second.headers['X-Session'] = 'second'
+        self.assertEqual(200, first.get(url).result().status_code)
+        resp = second.get(url).result()
+        self.assertEqual('second', resp.json()['headers']['X-Session'])
+        # the connection the first opened was reused
+        stats = first.adapters['http://'].pool_stats()
+        self.assertEqual(1, sum(s['idle'] for s in stats.values()))
+
+        pending = second.get(url)
+        second.close()
+        # closing waits for its own requests
+        self.assertTrue(pending.done())
+        self.assertEqual(1, registry.users('test'))
+        # and leaves everything in place for the others
+        self.assertEqual(200, first.get(url).result().status_code)
+
+        executor = first.executor
+        first.close()
+        self.assertNotIn('test', registry)
+        self.assertTrue(executor._shutdown)
+        # closing again doesn't release it again
+        first.close()
+        other.close()
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            FuturesSession(shared='test', executor=ThreadPoolExecutor(1))
+        with self.assertRaises(ValueError):
+            FuturesSession(shared='test', use_processes=True)
+        self.assertNotIn('test', registry)